@@ -0,0 +1,194 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import numpy as np
+
+import bezier_curve
+import curve_eval
+import csw
+from picking import PointGrid, SegmentGrid
+from bspline_spans import IncrementalBSpline
+
+# Microbenchmarks for the curve and clipping kernels.
+#
+# Every case sweeps its size parameters, reports time per call and throughput,
+# and can be saved as a JSON baseline; --compare flags cases that got slower
+# than the baseline by more than --threshold.
+
+FULL = {
+    'points': (4, 16, 64),
+    'degrees': (2, 3, 5),
+    'samples': (100, 400, 1600),
+    'lines': (100, 10000, 100000),
+    'picks': (100, 1000, 10000),
+}
+QUICK = {
+    'points': (4, 16),
+    'degrees': (3,),
+    'samples': (100, 400),
+    'lines': (100, 10000),
+    'picks': (100, 1000),
+}
+
+
+def measure(fn, min_time=0.05, repeat=5):
+    """Best seconds per call of fn() over `repeat` rounds of at least `min_time` each"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed * 1.2))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def cases(sizes, rng):
+    """Yield (name, params, fn, items per call, item unit) for every benchmark case"""
+    for n in sizes['points']:
+        pts = [tuple(p) for p in rng.uniform(0, 1000, (n, 2))]
+        yield 'bezier_point', {'points': n}, lambda: curve_eval.bezier_point(pts, 0.37), 1, 'samples'
+        yield 'flatten_bezier', {'points': n}, lambda: bezier_curve.flatten_bezier(pts, 0.5), 1, 'curves'
+        for s in sizes['samples']:
+            yield ('bezier_points', {'points': n, 'samples': s},
+                   lambda: curve_eval.bezier_points(pts, s), s + 1, 'samples')
+            yield ('bezier_points_forward', {'points': n, 'samples': s},
+                   lambda: curve_eval.bezier_points_forward(pts, s), s + 1, 'samples')
+
+    for k in sizes['degrees']:
+        for n in sizes['points']:
+            if n <= k:
+                continue
+            pts = rng.uniform(-1, 1, (n, 2))
+            knot = np.linspace(0, 1, n + k + 2)
+            t = 0.5 * (knot[k] + knot[n])
+            yield ('bspline_basis', {'degree': k, 'points': n},
+                   lambda: curve_eval.bspline_basis(n // 2, k, t, knot), 1, 'evals')
+            pts3 = np.hstack([pts, np.zeros((n, 1))])
+            for s in sizes['samples']:
+                yield ('bspline_curve', {'degree': k, 'points': n, 'samples': s},
+                       lambda: curve_eval.bspline_curve(pts, k, s), s, 'samples')
+
+                def cold():
+                    curve_eval.basis_matrix.cache_clear()
+                    curve_eval.bspline_curve(pts, k, s)
+                yield 'bspline_curve_cold', {'degree': k, 'points': n, 'samples': s}, cold, s, 'samples'
+                yield ('bspline_de_boor', {'degree': k, 'points': n, 'samples': s},
+                       lambda: curve_eval.bspline(pts3, k, s), s, 'samples')
+                yield ('bspline_forward', {'degree': k, 'points': n, 'samples': s},
+                       lambda: curve_eval.bspline(pts3, k, s, evaluator='forward'), s, 'samples')
+            curve = IncrementalBSpline(k, clamped=True)
+            curve.reset(pts)
+            yield ('bspline_incremental_move', {'degree': k, 'points': n},
+                   lambda: curve.move(n // 2, pts[n // 2]), 1, 'edits')
+
+            def adaptive_edit():
+                curve.move(n // 2, pts[n // 2])
+                curve.adaptive_points(0.0025)  # half a pixel in an 800 px wide NDC view
+            yield 'bspline_adaptive_edit', {'degree': k, 'points': n}, adaptive_edit, 1, 'edits'
+
+    for count in sizes['picks']:
+        grid = PointGrid()
+        grid.rebuild(rng.uniform(0, 1000, (count, 2)))
+        x, y = rng.uniform(0, 1000, 2)
+        yield 'pick_point', {'points': count}, lambda: grid.nearest(x, y, 20.0), 1, 'picks'
+        polyline = SegmentGrid(np.cumsum(rng.uniform(-5, 5, (count, 2)), axis=0) + 500)
+        yield 'pick_curve', {'samples': count}, lambda: polyline.nearest(500.0, 500.0, 10.0), 1, 'picks'
+
+    clipper = csw.LineClipping()
+    for count in sizes['lines']:
+        segs = rng.uniform(-1.5, 1.5, (count, 4))
+        if count <= 10000:
+            def scalar():
+                for line in segs.tolist():
+                    clipper.cohen_sutherland_clip(*line)
+            yield 'cohen_sutherland_clip', {'lines': count}, scalar, count, 'lines'
+        for engine in clipper.engines:
+            yield ('clip_batch', {'engine': engine.name, 'lines': count},
+                   lambda engine=engine: engine.clip_batch(clipper.clip_window, segs), count, 'lines')
+        # The same number of edges as polygons of 8 vertices
+        polygons = rng.uniform(-1.5, 1.5, (count // 8, 8, 2)).reshape(-1, 2)
+        offsets = np.arange(count // 8 + 1) * 8
+        yield ('polygon_clip_batch', {'edges': count},
+               lambda: clipper.clip_polygons(polygons, offsets), count, 'edges')
+
+
+def case_key(name, params):
+    return name + '[' + ','.join(f"{k}={params[k]}" for k in sorted(params)) + ']'
+
+
+def run(sizes, seed=0, only=None, min_time=0.05):
+    results = {}
+    for name, params, fn, items, unit in cases(sizes, np.random.default_rng(seed)):
+        if only and not any(pattern in name for pattern in only):
+            continue
+        seconds = measure(fn, min_time)
+        key = case_key(name, params)
+        results[key] = {
+            'name': name,
+            'params': params,
+            'seconds_per_call': seconds,
+            'throughput': items / seconds,
+            'unit': unit,
+        }
+        print(f"{key:<60} {seconds * 1e6:12.2f} us/call {items / seconds:14.4g} {unit}/s")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print cases slower than the baseline by more than `threshold`; return their keys"""
+    slower = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        ratio = result['seconds_per_call'] / baseline[key]['seconds_per_call']
+        if ratio > 1.0 + threshold:
+            slower.append(key)
+            print(f"SLOWER {key}: {ratio:.2f}x baseline")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the curve and clipping kernels.")
+    parser.add_argument('--quick', action='store_true', help="smaller sweep")
+    parser.add_argument('--only', nargs='*', help="run cases whose name contains one of these")
+    parser.add_argument('--min-time', type=float, default=0.05, help="seconds per timing round")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help="write results as a JSON baseline")
+    parser.add_argument('--compare', help="JSON baseline to check against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown before a case is flagged (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = run(QUICK if args.quick else FULL, args.seed, args.only, args.min_time)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'python': sys.version.split()[0],
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'results': results,
+            }, f, indent=2)
+        print(f"Saved {len(results)} results to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        slower = compare(results, baseline, args.threshold)
+        if slower:
+            print(f"{len(slower)} case(s) slower than baseline by more than {args.threshold:.0%}")
+            raise SystemExit(1)
+        print("No slowdowns beyond threshold.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,71 @@ from OpenGL.GLUT import *
 from OpenGL.GLU import *
 import sys
 import math
+import numpy as np
+from gl_batch import BatchRenderer
+from frame_profiler import FrameProfiler
+from frame_scheduler import FrameScheduler
+from glyph_atlas import GlyphAtlas, TextRenderer
+from picking import PointGrid, SegmentGrid
+from forward_diff import max_error
+from curve_eval import bezier_point, bezier_points, de_casteljau, bezier_points_forward, elevate_degree
 
 WIN_W, WIN_H = 1000, 700
-control_points = []    # list of (x,y)
+
+class ControlPointList(list):
+    """List of (x,y) control points whose `version` is bumped by every edit.
+
+    The curve cache compares versions instead of points, so handlers that mutate
+    the list invalidate the cached tessellation simply by editing it.
+    """
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = 0
+
+    def _edited(self):
+        self.version += 1
+
+    def append(self, p):
+        super().append(p)
+        self._edited()
+
+    def insert(self, i, p):
+        super().insert(i, p)
+        self._edited()
+
+    def extend(self, pts):
+        super().extend(pts)
+        self._edited()
+
+    def pop(self, i=-1):
+        p = super().pop(i)
+        self._edited()
+        return p
+
+    def clear(self):
+        super().clear()
+        self._edited()
+
+    def __setitem__(self, i, p):
+        super().__setitem__(i, p)
+        self._edited()
+
+    def __delitem__(self, i):
+        super().__delitem__(i)
+        self._edited()
+
+control_points = ControlPointList()    # list of (x,y)
 dragging_index = None
 show_polygon = True
+adaptive_mode = False  # False: uniform CURVE_RESOLUTION samples, True: flatness-based subdivision
 
 POINT_RADIUS = 6.0
 CURVE_RESOLUTION = 400  # number of samples along t (increase for smoother curve)
+FLATNESS_TOLERANCES = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0)  # pixels, cycled with 't'
+FLATNESS_MAX_DEPTH = 16  # subdivision limit (at most 2**16 pieces)
+flatness_tolerance = 0.5
+EVALUATORS = ('bernstein', 'forward')  # uniform sampling: Bernstein table or forward differencing ('e' cycles)
+evaluator = 'bernstein'
 
 def to_opengl_y(y):
     return WIN_H - y
@@ -18,84 +75,175 @@ def to_opengl_y(y):
 def distance_sq(a, b):
     return (a[0]-b[0])**2 + (a[1]-b[1])**2
 
-def bezier_point(ctrl_pts, t):
-    """Compute a point on Bezier curve at parameter t using de Casteljau (iterative)."""
-    # Make a local copy of points as floats
-    pts = [(float(x), float(y)) for (x,y) in ctrl_pts]
+def split_bezier(pts):
+    """Split a Bezier control polygon (n, 2) at t = 0.5 into left and right halves."""
     n = len(pts)
-    if n == 0:
-        return None
-    # de Casteljau iterative reduction
+    left = np.empty_like(pts)
+    right = np.empty_like(pts)
+    work = pts
+    left[0] = work[0]
+    right[n - 1] = work[n - 1]
     for r in range(1, n):
-        for i in range(n - r):
-            x = (1 - t) * pts[i][0] + t * pts[i+1][0]
-            y = (1 - t) * pts[i][1] + t * pts[i+1][1]
-            pts[i] = (x, y)
-    return pts[0]
-
-def draw_circle(x, y, radius):
-    glBegin(GL_TRIANGLE_FAN)
-    glVertex2f(x, y)
-    steps = 20
-    for i in range(steps+1):
-        theta = 2.0 * math.pi * i / steps
-        glVertex2f(x + math.cos(theta) * radius, y + math.sin(theta) * radius)
-    glEnd()
-
-def display_text(x, y, text):
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(GLUT_BITMAP_HELVETICA_12, ord(ch))
+        work = 0.5 * (work[:-1] + work[1:])
+        left[r] = work[0]
+        right[n - 1 - r] = work[-1]
+    return left, right
 
-def display():
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+def bezier_flatness(pts):
+    """Max distance of the inner control points from the chord pts[0]-pts[-1].
+
+    By the convex hull property the curve lies within this distance of the chord.
+    """
+    inner = pts[1:-1]
+    if len(inner) == 0:
+        return 0.0
+    a = pts[0]
+    d = pts[-1] - a
+    rel = inner - a
+    length_sq = d[0] * d[0] + d[1] * d[1]
+    if length_sq > 0.0:
+        # distance to the chord segment, so overshoot past the endpoints counts too
+        u = np.clip((rel @ d) / length_sq, 0.0, 1.0)
+        rel = rel - u[:, None] * d
+    return math.sqrt(float(np.max(np.einsum('ij,ij->i', rel, rel))))
+
+def flatten_bezier(ctrl_pts, tolerance=None, max_depth=FLATNESS_MAX_DEPTH, return_params=False):
+    """Adaptively flatten a Bezier curve into a polyline.
+
+    The curve is subdivided recursively until every piece lies within `tolerance`
+    (in the units of the control points, i.e. pixels here) of its chord, so the
+    vertex count follows the curve's on-screen complexity. With return_params
+    the curve parameter t of every vertex is returned as well.
+    """
+    if tolerance is None:
+        tolerance = flatness_tolerance
+    pts = np.asarray(ctrl_pts, dtype=float).reshape(-1, 2)
+    if len(pts) == 0:
+        return (np.empty((0, 2)), np.empty(0)) if return_params else np.empty((0, 2))
+    out = [pts[0]]
+    params = [0.0]
 
+    def subdivide(piece, depth, t0, t1):
+        if depth >= max_depth or bezier_flatness(piece) <= tolerance:
+            out.append(piece[-1])
+            params.append(t1)
+            return
+        left, right = split_bezier(piece)
+        mid = 0.5 * (t0 + t1)
+        subdivide(left, depth + 1, t0, mid)
+        subdivide(right, depth + 1, mid, t1)
+
+    subdivide(pts, 0, 0.0, 1.0)
+    if return_params:
+        return np.array(out), np.array(params)
+    return np.array(out)
+
+renderer = BatchRenderer()  # VBOs for the control polygon and curve
+profiler = FrameProfiler('bezier_curve')  # 'p' toggles the timing overlay
+scheduler = FrameScheduler()  # one posted redisplay per frame while dragging
+text = TextRenderer(GlyphAtlas("helvetica,arial", 14))  # glyphs rasterized once on first draw
+
+# Tessellation cache: rebuilt only when the control points or tessellation settings change
+_curve_cache = {'key': None, 'vertices': np.empty((0, 2)), 'params': np.empty(0), 'grid': None}
+
+def curve_cache_key():
+    settings = ('adaptive', flatness_tolerance) if adaptive_mode else ('uniform', CURVE_RESOLUTION, evaluator)
+    return (control_points.version,) + settings
+
+def curve_vertices():
+    """Return the cached curve polyline, re-tessellating only if it is stale."""
+    key = curve_cache_key()
+    if _curve_cache['key'] != key:
+        if len(control_points) < 2:
+            vertices, params = np.empty((0, 2)), np.empty(0)
+        elif adaptive_mode:
+            vertices, params = flatten_bezier(control_points, flatness_tolerance, return_params=True)
+        elif evaluator == 'forward':
+            vertices = bezier_points_forward(control_points, CURVE_RESOLUTION)
+            params = np.linspace(0.0, 1.0, CURVE_RESOLUTION + 1)
+        else:
+            vertices = bezier_points(control_points, CURVE_RESOLUTION)
+            params = np.linspace(0.0, 1.0, CURVE_RESOLUTION + 1)
+        _curve_cache['vertices'] = np.ascontiguousarray(vertices, dtype=np.float32)
+        _curve_cache['params'] = params
+        _curve_cache['grid'] = None
+        _curve_cache['key'] = key
+    return _curve_cache['vertices']
+
+def nearest_curve_point(x, y, max_dist=10.0):
+    """Return (t, (x, y)) of the curve point nearest to (x, y) within max_dist, or None.
+
+    The search runs on a segment grid over the cached tessellation, built on the
+    first pick after the curve changes; t is interpolated from the vertex params
+    and the returned point is evaluated exactly at t.
+    """
+    vertices = curve_vertices()
+    if _curve_cache['grid'] is None:
+        _curve_cache['grid'] = SegmentGrid(vertices)
+    hit = _curve_cache['grid'].nearest(x, y, max_dist)
+    if hit is None:
+        return None
+    seg, s, _, _ = hit
+    params = _curve_cache['params']
+    t = float(params[seg] + s * (params[seg + 1] - params[seg]))
+    return t, bezier_point(control_points, t)
+
+POINT_COLOR = (1.0, 0.2, 0.2)
+HIGHLIGHT_COLOR = (1.0, 0.8, 0.2)
+
+def draw_scene(target):
+    """Draw the control polygon, curve and control points through `target`.
+
+    `target` is the GL BatchRenderer or a headless.HeadlessRenderer.
+    """
     # Draw control polygon
     if show_polygon and len(control_points) >= 2:
-        glLineWidth(1.5)
-        glColor3f(1.0, 1.0, 1.0)
-        glBegin(GL_LINE_STRIP)
-        for (x,y) in control_points:
-            glVertex2f(x, y)
-        glEnd()
+        target.polyline('polygon', control_points, (1.0, 1.0, 1.0), 1.5, version=control_points.version)
 
     # Draw Bezier curve if at least 2 points
     if len(control_points) >= 2:
-        glLineWidth(3.0)
-        glColor3f(0.2, 1.0, 0.2)  # green curve
-        glBegin(GL_LINE_STRIP)
-        for i in range(CURVE_RESOLUTION + 1):
-            t = i / CURVE_RESOLUTION
-            p = bezier_point(control_points, t)
-            if p is not None:
-                glVertex2f(p[0], p[1])
-        glEnd()
-
-    # Draw control points
-    for idx, (x,y) in enumerate(control_points):
-        # point fill
-        if idx == dragging_index:
-            glColor3f(1.0, 0.8, 0.2)  # highlighted
-        else:
-            glColor3f(1.0, 0.2, 0.2)
-        draw_circle(x, y, POINT_RADIUS)
-        # outline
-        glLineWidth(1.0)
-        glColor3f(0.0, 0.0, 0.0)
-        glBegin(GL_LINE_LOOP)
-        steps = 20
-        for i in range(steps):
-            theta = 2.0 * math.pi * i / steps
-            glVertex2f(x + math.cos(theta) * POINT_RADIUS, y + math.sin(theta) * POINT_RADIUS)
-        glEnd()
+        # green curve, re-uploaded only when the tessellation changes
+        target.polyline('curve', curve_vertices(), (0.2, 1.0, 0.2), 3.0, version=curve_cache_key())
+
+    # Draw control points (highlighted while dragged)
+    if control_points:
+        colors = np.tile(POINT_COLOR, (len(control_points), 1))
+        if dragging_index is not None:
+            colors[dragging_index] = HIGHLIGHT_COLOR
+        target.markers('markers', control_points, POINT_RADIUS, colors,
+                       version=(control_points.version, dragging_index))
+
+def display_text(key, lines, color):
+    """Draw [(x, baseline y, text), ...] from the glyph atlas as one batch"""
+    text.draw(key, lines, color)
+
+def display():
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()
+
+    profiler.begin_frame()
+    with profiler.phase('curve'):
+        curve_vertices()
+    with profiler.phase('gl'):
+        draw_scene(renderer)
 
     # Instructions
-    glColor3f(0.9, 0.9, 0.8)
-    display_text(10, WIN_H - 20, "Left-click: add/mouse-drag point | Right-click: remove nearest point | 's' toggle control polygon | 'c' clear | 'q' quit")
+    if adaptive_mode:
+        mode = f"adaptive, tolerance {flatness_tolerance:g}px ('t' cycle)"
+    else:
+        mode = f"uniform, {CURVE_RESOLUTION + 1} samples, {evaluator} evaluator ('e' cycle)"
+    with profiler.phase('text'):
+        display_text('instructions', [
+            (10, WIN_H - 20, "Left-click: add/mouse-drag point | Right-click: remove nearest point | Middle-drag curve: add point (curve kept) and move it | 's' toggle control polygon | 'c' clear | 'q' quit"),
+            (10, WIN_H - 40, f"'a' toggle tessellation: {mode}"),
+        ], (0.9, 0.9, 0.8))
+        if profiler.show_overlay:
+            display_text('profiler', [(10, 20 + 18 * i, line) for i, line in enumerate(profiler.overlay_lines())], (0.6, 1.0, 0.6))
 
     glutSwapBuffers()
+    scheduler.frame_drawn()
+    profiler.end_frame()
 
 def reshape(w, h):
     global WIN_W, WIN_H
@@ -107,16 +255,15 @@ def reshape(w, h):
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
 
+# Picking grid over the control points, kept in step by the mouse handlers
+point_index = PointGrid()
+
 def find_nearest_point(x, y, max_dist=20.0):
     """Return index of nearest control point to (x,y) or None"""
-    best = None
-    best_d2 = max_dist * max_dist
-    for i, p in enumerate(control_points):
-        d2 = distance_sq(p, (x,y))
-        if d2 < best_d2:
-            best_d2 = d2
-            best = i
-    return best
+    if point_index.version != control_points.version:
+        # Edited without going through the handlers (e.g. cleared): re-index
+        point_index.rebuild(control_points, control_points.version)
+    return point_index.nearest(x, y, max_dist)
 
 def mouse(button, state, x, y):
     global dragging_index
@@ -129,6 +276,7 @@ def mouse(button, state, x, y):
         else:
             # add new control point
             control_points.append((x, gl_y))
+            point_index.add((x, gl_y), control_points.version)
         glutPostRedisplay()
     elif button == GLUT_LEFT_BUTTON and state == GLUT_UP:
         dragging_index = None
@@ -138,19 +286,37 @@ def mouse(button, state, x, y):
         idx = find_nearest_point(x, gl_y)
         if idx is not None:
             control_points.pop(idx)
+            # later indices shift down, so re-index
+            point_index.rebuild(control_points, control_points.version)
             print(f"Removed control point {idx}")
         glutPostRedisplay()
+    elif button == GLUT_MIDDLE_BUTTON and state == GLUT_DOWN:
+        # add a control point by degree elevation, which keeps the curve as it is
+        hit = nearest_curve_point(x, gl_y)
+        if hit is not None:
+            t, _ = hit
+            control_points[:] = [tuple(p) for p in elevate_degree(control_points).tolist()]
+            point_index.rebuild(control_points, control_points.version)
+            # drag the point whose Greville abscissa i/n is nearest the click
+            n = len(control_points) - 1
+            dragging_index = min(max(round(t * n), 1), n - 1)
+            print(f"Elevated to degree {n}; dragging control point {dragging_index} (t={t:.3f})")
+        glutPostRedisplay()
+    elif button == GLUT_MIDDLE_BUTTON and state == GLUT_UP:
+        dragging_index = None
+        glutPostRedisplay()
 
 def motion(x, y):
     global dragging_index
     if dragging_index is not None:
         gl_y = to_opengl_y(y)
         control_points[dragging_index] = (x, gl_y)
-        glutPostRedisplay()
+        point_index.move(dragging_index, (x, gl_y), control_points.version)
+        scheduler.request(glutPostRedisplay)
 
 def keyboard(key, x, y):
     ch = key.decode('utf-8') if isinstance(key, bytes) else key
-    global show_polygon
+    global show_polygon, adaptive_mode, flatness_tolerance, evaluator
     if ch in ('c', 'r', 'C', 'R'):
         control_points.clear()
         print("Cleared control points.")
@@ -158,6 +324,27 @@ def keyboard(key, x, y):
     elif ch in ('s', 'S'):
         show_polygon = not show_polygon
         glutPostRedisplay()
+    elif ch in ('a', 'A'):
+        adaptive_mode = not adaptive_mode
+        print(f"Tessellation: {'adaptive' if adaptive_mode else 'uniform'}")
+        glutPostRedisplay()
+    elif ch in ('t', 'T'):
+        i = FLATNESS_TOLERANCES.index(flatness_tolerance) if flatness_tolerance in FLATNESS_TOLERANCES else -1
+        flatness_tolerance = FLATNESS_TOLERANCES[(i + 1) % len(FLATNESS_TOLERANCES)]
+        print(f"Flatness tolerance: {flatness_tolerance:g}px")
+        glutPostRedisplay()
+    elif ch in ('e', 'E'):
+        evaluator = EVALUATORS[(EVALUATORS.index(evaluator) + 1) % len(EVALUATORS)]
+        message = f"Uniform evaluator: {evaluator}"
+        if len(control_points) >= 2:
+            samples = (bezier_points_forward if evaluator == 'forward' else bezier_points)(control_points, CURVE_RESOLUTION)
+            reference = de_casteljau(control_points, np.linspace(0.0, 1.0, CURVE_RESOLUTION + 1))
+            message += f" (max error vs de Casteljau: {max_error(samples, reference):.3g}px)"
+        print(message)
+        glutPostRedisplay()
+    elif ch in ('p', 'P'):
+        print(f"Profiling overlay: {'on' if profiler.toggle_overlay() else 'off'}")
+        glutPostRedisplay()
     elif ch == 'q' or ch == '\x1b':
         print("Exiting.")
         sys.exit(0)
@@ -174,7 +361,7 @@ def main():
     glutMouseFunc(mouse)
     glutMotionFunc(motion)
     glutKeyboardFunc(keyboard)
-    print("Bezier Curve Demo ready. Left-click to add points. Drag to move. Right-click to remove. 'c' clear, 's' toggle polygon, 'q' quit.")
+    print("Bezier Curve Demo ready. Left-click to add points. Drag to move. Right-click to remove. Middle-drag on the curve to add a point without changing the curve and move it. 'c' clear, 's' toggle polygon, 'a' adaptive tessellation, 't' tolerance, 'e' uniform evaluator, 'p' profiling overlay, 'q' quit.")
     glutMainLoop()
 
 if __name__ == "__main__":
@@ -2,56 +2,40 @@ import pygame
 from pygame.locals import *
 from OpenGL.GL import *
 import numpy as np
+from bspline_spans import IncrementalBSpline
+from gl_batch import BatchRenderer
+from frame_profiler import FrameProfiler
+from frame_scheduler import FrameScheduler, pygame_events
+from glyph_atlas import GlyphAtlas, TextRenderer
+
+ADAPTIVE_TOLERANCE = 0.5  # pixels; largest chord deviation allowed by adaptive sampling
+
+def draw_scene(target, curve, tolerance=None):
+    """Draw the control polygon, points and curve of an IncrementalBSpline through `target`
+    (the GL BatchRenderer or a headless.HeadlessRenderer). With a `tolerance` (pixels)
+    the curve is sampled adaptively instead of uniformly per span."""
+    # Draw control polygon
+    target.polyline('polygon', curve.control_points, (1, 0, 0), version=curve.version)
+
+    # Draw control points
+    target.points('points', curve.control_points, (1, 1, 0), 6, version=curve.version)
+
+    # Draw B-Spline curve if enough points
+    if len(curve) > curve.degree:
+        if tolerance:
+            target.polyline('curve', curve.adaptive_points(tolerance), (0, 1, 0),
+                            version=(curve.version, tolerance))
+        else:
+            target.polyline('curve', curve.points(), (0, 1, 0), version=curve.version)
 
 
-# Function to compute B-spline curve using De Boor's algorithm
-def bspline(control_points, degree=3, num_points=200):
-    n = len(control_points) - 1
-    if n < degree:
-        return np.array([])  # Not enough points for the curve
+# Instruction text: glyphs rasterized once into a texture, strings drawn as quads
+text = TextRenderer(GlyphAtlas("Consolas", 18))
 
-    k = degree
-    m = n + k + 1
 
-    # Uniform knot vector
-    knots = np.array([0] * (k + 1) + list(range(1, m - 2 * k)) + [m - 2 * k] * (k + 1), dtype=float)
-    knots = knots / max(knots)
-
-    def de_boor(k, x, t, c):
-        n = len(c) - 1
-        # Find knot span
-        for i in range(n + k + 1):
-            if t[i] <= x < t[i + 1]:
-                break
-        else:
-            i = n
-        d = [c[j + i - k] for j in range(0, k + 1)]
-        for r in range(1, k + 1):
-            for j in range(k, r - 1, -1):
-                alpha = (x - t[j + i - k]) / (t[j + 1 + i - r] - t[j + i - k])
-                d[j] = (1.0 - alpha) * np.array(d[j - 1]) + alpha * np.array(d[j])
-        return d[k]
-
-    u = np.linspace(0, 1, num_points)
-    curve = np.array([de_boor(k, x, knots, control_points) for x in u])
-    return curve
-
-
-def draw_text(x, y, text, color=(1, 1, 1)):
-    """Draw simple text using OpenGL raster functions."""
-    glColor3f(*color)
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter = getattr(pygame, 'GLUT_BITMAP_HELVETICA_18', None)
-        if glutBitmapCharacter:
-            glutBitmapCharacter(ch)
-        else:
-            # Fallback: render using pygame.font
-            font = pygame.font.SysFont("Arial", 18)
-            surface = font.render(text, True, (255, 255, 255))
-            data = pygame.image.tostring(surface, "RGBA", True)
-            glDrawPixels(surface.get_width(), surface.get_height(), GL_RGBA, GL_UNSIGNED_BYTE, data)
-            break
+def draw_text(x, y, string, color=(1, 1, 1)):
+    """Draw a string with its baseline at (x, y) using the cached glyph atlas."""
+    text.draw(('draw_text', x, y), [(x, y, string)], color)
 
 
 def main():
@@ -68,10 +52,18 @@ def main():
 
     control_points = []
     degree = 3  # Cubic B-spline
+    curve = IncrementalBSpline(degree, clamped=True, dim=3)  # re-samples only the spans an edit touches
+    renderer = BatchRenderer()
+    profiler = FrameProfiler('bspline')
+    scheduler = FrameScheduler()  # redraw only after an edit; sleep in between
+    adaptive = False  # A toggles curvature-adaptive sampling
+    clock = pygame.time.Clock()
 
     running = True
     while running:
-        for event in pygame.event.get():
+        events = pygame_events(scheduler, clock=clock)
+        profiler.begin_frame()
+        for event in events:
             if event.type == QUIT:
                 running = False
 
@@ -79,56 +71,51 @@ def main():
                 if event.button == 1:  # Left click → Add control point
                     x, y = event.pos
                     control_points.append([x, display[1] - y, 0])  # Flip y-axis for OpenGL coords
+                    curve.append(control_points[-1])
+                    scheduler.invalidate()
 
             elif event.type == KEYDOWN:
                 if event.key == K_c:
                     control_points.clear()  # Clear control points
+                    curve.clear()
+                    scheduler.invalidate()
+                elif event.key == K_a:
+                    adaptive = not adaptive
+                    scheduler.invalidate()
+                elif event.key == K_p:
+                    profiler.toggle_overlay()
+                    scheduler.invalidate()
                 elif event.key == K_ESCAPE:
                     running = False
 
+        if not scheduler.frame_due():
+            profiler.cancel_frame()
+            continue
+
         # Draw
         glClear(GL_COLOR_BUFFER_BIT)
         glLoadIdentity()
 
-        # Draw control polygon
-        glColor3f(1, 0, 0)
-        glBegin(GL_LINE_STRIP)
-        for p in control_points:
-            glVertex3fv(p)
-        glEnd()
-
-        # Draw control points
-        glPointSize(6)
-        glColor3f(1, 1, 0)
-        glBegin(GL_POINTS)
-        for p in control_points:
-            glVertex3fv(p)
-        glEnd()
-
-        # Draw B-Spline curve if enough points
-        if len(control_points) > degree:
-            curve_points = bspline(np.array(control_points), degree=degree)
-            glColor3f(0, 1, 0)
-            glBegin(GL_LINE_STRIP)
-            for p in curve_points:
-                glVertex3fv(p)
-            glEnd()
+        with profiler.phase('gl'):
+            draw_scene(renderer, curve, ADAPTIVE_TOLERANCE if adaptive else None)
 
         # Display instructions
-        font = pygame.font.SysFont("Consolas", 18)
-        instructions = [
-            "Left Click: Add control point",
-            "C: Clear points",
-            "ESC: Exit",
-        ]
-        for i, text in enumerate(instructions):
-            text_surface = font.render(text, True, (255, 255, 255))
-            text_data = pygame.image.tostring(text_surface, "RGBA", True)
-            glWindowPos2d(10, display[1] - 25 - i * 25)
-            glDrawPixels(text_surface.get_width(), text_surface.get_height(), GL_RGBA, GL_UNSIGNED_BYTE, text_data)
-
-        pygame.display.flip()
-        pygame.time.wait(15)
+        with profiler.phase('text'):
+            instructions = [
+                "Left Click: Add control point",
+                "C: Clear points",
+                f"A: Adaptive sampling ({'on' if adaptive else 'off'})",
+                "P: Toggle profiling overlay",
+                "ESC: Exit",
+            ]
+            if profiler.show_overlay:
+                instructions += profiler.overlay_lines()
+            text.draw('instructions', [(10, display[1] - 20 - i * 25, line) for i, line in enumerate(instructions)])
+
+        with profiler.phase('flip'):
+            pygame.display.flip()
+        scheduler.frame_drawn()
+        profiler.end_frame()
 
     pygame.quit()
 
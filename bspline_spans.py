@@ -0,0 +1,283 @@
+import numpy as np
+from functools import lru_cache
+
+# Incremental B-spline sampling shared by bspline.py and bsplines.py.
+#
+# A control point only influences `degree + 1` knot spans, so the curve is kept
+# as one Bezier segment per knot span plus its samples, and an edit converts and
+# re-samples only the spans whose control points or knots changed. Conversion
+# is a product with a per-span matrix found once by Boehm knot insertion and
+# cached by the span's local knots; sampling a segment is one product with the
+# cached Bernstein table, so no knot recurrence runs per edit or per sample.
+# The same segments give the first and second derivatives, which drive the
+# curvature-adaptive sampler.
+
+SAMPLES_PER_SPAN = 16  # segments drawn per knot span
+BASIS_CACHE_SIZE = 32  # Bernstein tables kept alive (one per (degree, resolution))
+CONVERSION_CACHE_SIZE = 256  # span conversion matrices kept alive (one per degree/local knot spacing)
+
+
+@lru_cache(maxsize=BASIS_CACHE_SIZE)
+def bernstein_matrix(degree, resolution):
+    """Return the (resolution+1, degree+1) Bernstein basis table for t = i/resolution.
+
+    Built with the de Casteljau-style recurrence B(r,k) = (1-t) B(r-1,k) + t B(r-1,k-1)
+    so it stays stable for high degrees. The result is cached and read-only.
+    """
+    t = np.linspace(0.0, 1.0, resolution + 1)[:, None]
+    s = 1.0 - t
+    basis = np.zeros((resolution + 1, degree + 1))
+    basis[:, 0] = 1.0
+    for r in range(1, degree + 1):
+        prev = basis[:, :r].copy()
+        basis[:, :r] = s * prev
+        basis[:, 1:r + 1] += t * prev
+    basis.flags.writeable = False
+    return basis
+
+
+def insert_knot(knots, ctrl, degree, t, times=1):
+    """Boehm's algorithm: insert t into the knot vector `times` times.
+
+    Returns (knots, ctrl) describing the same curve with t added; each insertion
+    replaces the degree control points around t by degree+1 blended ones.
+    """
+    knots = np.asarray(knots, dtype=float)
+    ctrl = np.asarray(ctrl, dtype=float)
+    k = degree
+    for _ in range(times):
+        # Span l with knots[l] <= t < knots[l+1] (t at the end of the knots goes in the last span)
+        l = int(np.searchsorted(knots, t, side='right')) - 1
+        l = min(l, len(ctrl) - 1)
+        i = np.arange(l - k + 1, l + 1)
+        alpha = (t - knots[i]) / (knots[i + k] - knots[i])
+        alpha = alpha.reshape((-1,) + (1,) * (ctrl.ndim - 1))
+        blended = (1.0 - alpha) * ctrl[i - 1] + alpha * ctrl[i]
+        ctrl = np.concatenate([ctrl[:l - k + 1], blended, ctrl[l:]])
+        knots = np.concatenate([knots[:l + 1], [t], knots[l + 1:]])
+    return knots, ctrl
+
+
+def bezier_segments(knots, ctrl, degree):
+    """Split a B-spline into its Bezier pieces by knot insertion.
+
+    Every distinct knot in the domain [knots[k], knots[n+1]] is raised to
+    multiplicity `degree`; control points degree apart then bound the pieces.
+    Returns a (pieces, degree+1, dim) array, one row per non-empty knot span.
+    """
+    knots = np.asarray(knots, dtype=float)
+    ctrl = np.asarray(ctrl, dtype=float)
+    k, n = degree, len(ctrl) - 1
+    if n < k:
+        return np.zeros((0, k + 1) + ctrl.shape[1:])
+    for t in np.unique(knots[k:n + 2]):
+        multiplicity = int(np.count_nonzero(knots == t))
+        if multiplicity < k:
+            knots, ctrl = insert_knot(knots, ctrl, k, t, k - multiplicity)
+    n = len(ctrl) - 1
+    spans = [i for i in range(k, n + 1) if knots[i] < knots[i + 1]]
+    return np.stack([ctrl[i - k:i + 1] for i in spans])
+
+
+@lru_cache(maxsize=CONVERSION_CACHE_SIZE)
+def conversion_matrix(degree, local_knots):
+    """(degree+1, degree+1) matrix taking a span's control points to its Bezier points.
+
+    `local_knots` is the tuple of the 2*degree+2 knots around the span, shifted
+    so the span starts at 0. Knot insertion is linear in the control points, so
+    converting the identity gives the matrix. The result is cached and read-only.
+    """
+    matrix = bezier_segments(local_knots, np.eye(degree + 1), degree)[0]
+    matrix.flags.writeable = False
+    return matrix
+
+
+class IncrementalBSpline:
+    """B-spline polyline that re-evaluates only the knot spans touched by an edit.
+
+    Knots are kept in integer form so every span has unit length:
+      clamped=True  -> [0]*(k+1), 1, ..., n-k, [n-k+1]*(k+1)   (as in bspline.py)
+      clamped=False -> 0, 1, ..., n+k+1                        (as in bsplines.py)
+    Both match the normalized knot vectors of the demos up to a scale factor,
+    so the curves are identical. Span i (degree <= i <= n) owns Bezier segment
+    i-degree and the sample rows (i-degree)*s ... (i-degree)*s + s of the
+    buffer, sharing its end row with the next span.
+    """
+
+    def __init__(self, degree=3, samples_per_span=SAMPLES_PER_SPAN, clamped=True, dim=2):
+        self.degree = degree
+        self.samples_per_span = samples_per_span
+        self.clamped = clamped
+        self.dim = dim
+        self._ctrl = np.zeros((0, dim))
+        self._samples = np.zeros((0, dim))
+        self._bezier = np.zeros((0, degree + 1, dim))
+        self._count = 0
+        self._adaptive = (None, None)  # (version, tolerance) and the samples of the last adaptive_points()
+        self.version = 0  # bumped by every edit, for callers caching derived data
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def control_points(self):
+        return self._ctrl[:self._count]
+
+    @property
+    def num_spans(self):
+        return max(0, self._count - self.degree)
+
+    def segments(self):
+        """Return the Bezier control points of every span as a (num_spans, degree+1, dim) view."""
+        return self._bezier[:self.num_spans]
+
+    def points(self):
+        """Return the sampled curve as a (num_spans*s + 1, dim) view (empty if too few points)."""
+        if self.num_spans == 0:
+            return self._samples[:0]
+        return self._samples[:self.num_spans * self.samples_per_span + 1]
+
+    # ----------------- Derivatives and adaptive sampling -----------------
+    def derivatives(self, t):
+        """Points, first and second derivatives at curve parameters t in [0, num_spans].
+
+        The parameter runs one unit per knot span (the integer knots of the
+        class), so derivatives are with respect to that parameter. Each is
+        evaluated from the cached Bezier segment of its span; returns three
+        (len(t), dim) arrays.
+        """
+        t = np.asarray(t, dtype=float)
+        k = self.degree
+        seg = np.clip(np.floor(t).astype(np.intp), 0, max(self.num_spans - 1, 0))
+        u = (t - seg)[:, None, None]
+        # de Casteljau on every segment at once; the last three levels hold the derivatives
+        b = self._bezier[seg]                                     # (m, k+1, dim)
+        second = np.zeros((len(t), self.dim))
+        for r in range(k, 0, -1):
+            if r == 2:
+                second = k * (k - 1) * (b[:, 2] - 2.0 * b[:, 1] + b[:, 0])
+            if r == 1:
+                first = k * (b[:, 1] - b[:, 0])
+            b = (1.0 - u) * b[:, :-1] + u * b[:, 1:]
+        return b[:, 0], first, second
+
+    def adaptive_points(self, tolerance):
+        """Sample the curve so no chord strays more than about `tolerance` from it.
+
+        Density per unit parameter is sqrt(kappa |C'|^2 / (8 tolerance)), i.e. the
+        chord error kappa L^2 / 8, using all of |C''| near cusps; cached per version.
+        """
+        key = (self.version, self.degree, tolerance)
+        if self._adaptive[0] == key:
+            return self._adaptive[1]
+        spans, s = self.num_spans, self.samples_per_span
+        if spans == 0:
+            return self._samples[:0]
+        grid = np.arange(spans)[:, None] + np.linspace(0.0, 1.0, s + 1)   # (spans, s+1) parameters
+        _, first, second = self.derivatives(grid.ravel())
+        speed_sq = np.einsum('md,md->m', first, first)
+        accel_sq = np.einsum('md,md->m', second, second)
+        along = np.einsum('md,md->m', first, second)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # |C''|^2 - (C'.C'')^2/|C'|^2, or all of |C''| where |C'| < 4 |C''| / s
+            normal_sq = np.where(speed_sq * s * s > 16.0 * accel_sq, accel_sq - along * along / speed_sq, accel_sq)
+        density = np.sqrt(np.sqrt(np.maximum(normal_sq, 0.0)) / (8.0 * tolerance)).reshape(spans, s + 1)
+        # Running integral within each span, normalized to 0..1
+        integral = np.zeros((spans, s + 1))
+        integral[:, 1:] = np.cumsum(np.maximum(density[:, 1:], density[:, :-1]) / s, axis=1)
+        total = integral[:, -1]
+        counts = np.maximum(np.ceil(total), 1).astype(np.intp)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(total[:, None] > 0.0, integral / total[:, None], grid - grid[:, :1])
+        # Offsetting span i by i keeps the table increasing, so one interp serves every span
+        span = np.repeat(np.arange(spans), counts)
+        step = np.arange(len(span)) - np.repeat(np.cumsum(counts) - counts, counts)
+        targets = np.append(span + step / counts[span], spans)
+        t = np.interp(targets, (np.arange(spans)[:, None] + fraction).ravel(), grid.ravel())
+        points = self.derivatives(t)[0]
+        self._adaptive = (key, points)
+        return points
+
+    # ----------------- Edits -----------------
+    def append(self, p):
+        self.version += 1
+        self._reserve(self._count + 1)
+        self._ctrl[self._count] = p
+        self._count += 1
+        n, k = self._count - 1, self.degree
+        if self.clamped:
+            # The end clamp moves, changing the last k knots
+            self._resample(n - k + 1, n)
+        else:
+            self._resample(n, n)
+
+    def move(self, j, p):
+        self.version += 1
+        self._ctrl[j] = p
+        k = self.degree
+        self._resample(j, j + k)
+
+    def clear(self):
+        self.version += 1
+        self._count = 0
+
+    def reset(self, points):
+        self.version += 1
+        pts = np.asarray(points, dtype=float).reshape(-1, self.dim)
+        self._count = 0
+        self._reserve(len(pts))
+        self._ctrl[:len(pts)] = pts
+        self._count = len(pts)
+        self._resample_all()
+
+    def set_degree(self, degree):
+        self.version += 1
+        self.degree = degree
+        self._bezier = np.zeros((0, degree + 1, self.dim))
+        self._resample_all()
+
+    # ----------------- Internals -----------------
+    def _reserve(self, count):
+        if count > len(self._ctrl):
+            cap = max(count, 2 * len(self._ctrl), 16)
+            ctrl = np.zeros((cap, self.dim))
+            ctrl[:self._count] = self._ctrl[:self._count]
+            self._ctrl = ctrl
+        rows = max(0, count - self.degree) * self.samples_per_span + 1
+        if rows > len(self._samples):
+            cap = max(rows, 2 * len(self._samples))
+            samples = np.zeros((cap, self.dim))
+            samples[:len(self._samples)] = self._samples
+            self._samples = samples
+        spans = max(0, count - self.degree)
+        if spans > len(self._bezier):
+            bezier = np.zeros((max(spans, 2 * len(self._bezier)), self.degree + 1, self.dim))
+            bezier[:len(self._bezier)] = self._bezier
+            self._bezier = bezier
+
+    def _resample_all(self):
+        self._reserve(self._count)
+        self._resample(self.degree, self._count - 1)
+
+    def _knots(self, idx):
+        n, k = self._count - 1, self.degree
+        if self.clamped:
+            return np.clip(idx - k, 0, n - k + 1).astype(float)
+        return idx.astype(float)
+
+    def _resample(self, first, last):
+        """Convert spans first..last (clipped to the valid range degree..n) to Bezier and sample them."""
+        n, k, s = self._count - 1, self.degree, self.samples_per_span
+        first, last = max(first, k), min(last, n)
+        if first > last:
+            return
+        spans = np.arange(first, last + 1)
+        # Span i depends on control points i-k..i and knots i-k..i+k+1 only
+        knots = self._knots(spans[:, None] - k + np.arange(2 * k + 2))
+        local = (knots - knots[:, k:k + 1]).tolist()
+        matrices = np.stack([conversion_matrix(k, tuple(row)) for row in local])
+        window = self._ctrl[spans[:, None] - k + np.arange(k + 1)]
+        bezier = np.einsum('mij,mjd->mid', matrices, window)
+        self._bezier[spans - k] = bezier
+        rows = (spans[:, None] - k) * s + np.arange(s + 1)
+        self._samples[rows] = np.einsum('uj,mjd->mud', bernstein_matrix(k, s), bezier)
@@ -1,71 +1,51 @@
 import glfw
 from OpenGL.GL import *
 import numpy as np
-
-# ----------------- Helper: B-spline Basis Function -----------------
-def bspline_basis(i, k, t, knot):
-    """Recursive definition of B-spline basis function"""
-    if k == 0:
-        return 1.0 if knot[i] <= t < knot[i + 1] else 0.0
-    else:
-        left = 0.0
-        right = 0.0
-        if knot[i + k] - knot[i] != 0:
-            left = ((t - knot[i]) / (knot[i + k] - knot[i])) * bspline_basis(i, k - 1, t, knot)
-        if knot[i + k + 1] - knot[i + 1] != 0:
-            right = ((knot[i + k + 1] - t) / (knot[i + k + 1] - knot[i + 1])) * bspline_basis(i + 1, k - 1, t, knot)
-        return left + right
-
-# ----------------- Generate B-spline Curve Points -----------------
-def bspline_curve(control_points, degree=3, num_points=100):
-    n = len(control_points) - 1
-    k = degree
-    m = n + k + 1  # number of knots
-    # Uniform knot vector
-    knot = np.linspace(0, 1, m + 1)
-    
-    t_values = np.linspace(knot[k], knot[n + 1], num_points)
-    curve = []
-    for t in t_values:
-        x = y = 0
-        for i in range(n + 1):
-            coeff = bspline_basis(i, k, t, knot)
-            x += coeff * control_points[i][0]
-            y += coeff * control_points[i][1]
-        curve.append((x, y))
-    return curve
+from bspline_spans import IncrementalBSpline
+from gl_batch import BatchRenderer
+from frame_profiler import FrameProfiler
+from frame_scheduler import FrameScheduler, glfw_wait
 
 # ----------------- OpenGL Display -----------------
+ADAPTIVE_TOLERANCE = 0.5  # pixels; largest chord deviation allowed by adaptive sampling
+
 control_points = []
 degree = 3  # Default cubic
+adaptive = False  # A toggles curvature-adaptive sampling
+curve = IncrementalBSpline(degree, clamped=False)  # per-span samples, updated on edits
+renderer = BatchRenderer()
+profiler = FrameProfiler('bsplines')  # P toggles frame timings in the window title
+scheduler = FrameScheduler()  # callbacks invalidate; the main loop sleeps until then
+WINDOW_TITLE = "B-Spline Curve (Press 1–4 to change degree, C to clear, A for adaptive sampling, P to profile)"
 
-def display():
-    glClear(GL_COLOR_BUFFER_BIT)
-    
+def draw_scene(target, tolerance=None):
+    """Draw points, polygon and curve through `target` (BatchRenderer or HeadlessRenderer).
+
+    `tolerance` (in curve coordinates) switches the curve to adaptive sampling."""
     # Draw control points
-    glPointSize(8)
-    glColor3f(1, 0, 0)
-    glBegin(GL_POINTS)
-    for p in control_points:
-        glVertex2f(p[0], p[1])
-    glEnd()
+    target.points('points', curve.control_points, (1, 0, 0), 8, version=curve.version)
 
     # Draw control polygon
     if len(control_points) > 1:
-        glColor3f(0.6, 0.6, 0.6)
-        glBegin(GL_LINE_STRIP)
-        for p in control_points:
-            glVertex2f(p[0], p[1])
-        glEnd()
+        target.polyline('polygon', curve.control_points, (0.6, 0.6, 0.6), version=curve.version)
 
     # Draw B-spline curve
     if len(control_points) > degree:
-        curve = bspline_curve(control_points, degree)
-        glColor3f(0, 1, 0)
-        glBegin(GL_LINE_STRIP)
-        for p in curve:
-            glVertex2f(p[0], p[1])
-        glEnd()
+        if tolerance:
+            target.polyline('curve', curve.adaptive_points(tolerance), (0, 1, 0),
+                            version=(curve.version, tolerance))
+        else:
+            target.polyline('curve', curve.points(), (0, 1, 0), version=curve.version)
+
+def display():
+    glClear(GL_COLOR_BUFFER_BIT)
+    
+    tolerance = None
+    if adaptive:
+        # Pixels to NDC: the view spans 2 units across the window
+        w, h = glGetIntegerv(GL_VIEWPORT)[2:]
+        tolerance = ADAPTIVE_TOLERANCE * 2.0 / max(w, h, 1)
+    draw_scene(renderer, tolerance)
 
 # ----------------- Input Handling -----------------
 def mouse_button(window, button, action, mods):
@@ -76,31 +56,61 @@ def mouse_button(window, button, action, mods):
         x = (x / w) * 2 - 1
         y = -((y / h) * 2 - 1)
         control_points.append((x, y))
+        curve.append((x, y))
+        scheduler.invalidate()
 
 def key_callback(window, key, scancode, action, mods):
-    global degree
+    global degree, adaptive
     if action == glfw.PRESS:
         if key == glfw.KEY_C:
             control_points.clear()
+            curve.clear()
+            scheduler.invalidate()
         elif key in [glfw.KEY_1, glfw.KEY_2, glfw.KEY_3, glfw.KEY_4]:
             degree = int(chr(key))  # 1, 2, 3, 4
+            curve.set_degree(degree)
+            scheduler.invalidate()
             print(f"Degree changed to {degree}")
+        elif key == glfw.KEY_A:
+            adaptive = not adaptive
+            scheduler.invalidate()
+            print(f"Sampling: {'adaptive' if adaptive else 'uniform'}")
+        elif key == glfw.KEY_P:
+            if not profiler.toggle_overlay():
+                glfw.set_window_title(window, WINDOW_TITLE)
+            scheduler.invalidate()
+
+def refresh(window):
+    scheduler.invalidate()
 
 # ----------------- Main -----------------
 def main():
     if not glfw.init():
         return
-    window = glfw.create_window(800, 600, "B-Spline Curve (Press 1–4 to change degree, C to clear)", None, None)
+    window = glfw.create_window(800, 600, WINDOW_TITLE, None, None)
     glfw.make_context_current(window)
     glfw.set_mouse_button_callback(window, mouse_button)
     glfw.set_key_callback(window, key_callback)
+    glfw.set_window_refresh_callback(window, refresh)
+    glfw.swap_interval(1)  # at most one frame per vsync
     
     glClearColor(0, 0, 0, 1)
     
     while not glfw.window_should_close(window):
-        display()
-        glfw.swap_buffers(window)
-        glfw.poll_events()
+        if not scheduler.frame_due():
+            glfw_wait(scheduler)  # blocks until a callback has something to draw
+            continue
+        profiler.begin_frame()
+        with profiler.phase('gl'):
+            display()
+        with profiler.phase('swap'):
+            glfw.swap_buffers(window)
+        scheduler.frame_drawn()
+        with profiler.phase('events'):
+            glfw.poll_events()
+        profiler.end_frame()
+        if profiler.show_overlay and profiler.title_due():
+            glfw.set_window_title(window, profiler.overlay_title())
     
     glfw.terminate()
 
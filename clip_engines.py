@@ -0,0 +1,444 @@
+import numpy as np
+
+# Line and polygon clipping against an axis-aligned clip window.
+#
+# The window is a dict with 'xmin', 'xmax', 'ymin' and 'ymax'. Line engines
+# clip one segment with clip() or an (N, 4) array with clip_batch(); the
+# Sutherland-Hodgman engine clips flat-packed polygon batches. csw.py draws
+# with these, and clip_stream.py and headless.py use them without loading
+# pygame or OpenGL.
+
+# Region codes for Cohen-Sutherland algorithm
+INSIDE = 0  # 0000
+LEFT = 1    # 0001
+RIGHT = 2   # 0010
+BOTTOM = 4  # 0100
+TOP = 8     # 1000
+
+
+def region_code(window, x, y):
+    """Compute region code for a point(x,y) against a clip window dict"""
+    code = INSIDE
+    if x < window['xmin']:
+        code |= LEFT
+    elif x > window['xmax']:
+        code |= RIGHT
+    if y < window['ymin']:
+        code |= BOTTOM
+    elif y > window['ymax']:
+        code |= TOP
+    return code
+
+
+def region_codes(window, x, y):
+    """Compute region codes for arrays of points (vectorized region_code)"""
+    code = np.zeros(np.shape(x), dtype=np.int8)
+    code[x < window['xmin']] |= LEFT
+    code[x > window['xmax']] |= RIGHT
+    code[y < window['ymin']] |= BOTTOM
+    code[y > window['ymax']] |= TOP
+    return code
+
+
+def next_vertex(offsets):
+    """Index of the following vertex of every vertex in flat-packed polygons (wrapping at each end)"""
+    offsets = np.asarray(offsets, dtype=np.intp)
+    counts = np.diff(offsets)
+    nxt = np.arange(1, offsets[-1] + 1)
+    nxt[offsets[1:][counts > 0] - 1] = offsets[:-1][counts > 0]
+    return nxt
+
+
+def polygon_edges(points, offsets):
+    """(E, 4) closed outline segments (x1, y1, x2, y2) of flat-packed polygons"""
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    return np.hstack([pts, pts[next_vertex(offsets)]])
+
+
+def _reserve(array, size, used):
+    """`array`, or a copy of its first `used` rows with room for `size` rows (capacity doubles)"""
+    if size <= len(array):
+        return array
+    grown = np.empty((max(size, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
+
+
+class PolygonBatch:
+    """Flat-packed polygons and their outline segments, grown in place.
+
+    Storage doubles when it fills up, so appending polygons one at a time
+    copies each vertex O(1) times on average. `points`, `offsets` and `edges`
+    (polygon_edges of the batch) are views of the filled part.
+    """
+
+    def __init__(self, points=None, offsets=None):
+        self.clear()
+        if points is not None:
+            self.extend(points, offsets)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def points(self):
+        return self._points[:self._offsets[self.count]]
+
+    @property
+    def offsets(self):
+        return self._offsets[:self.count + 1]
+
+    @property
+    def edges(self):
+        return self._edges[:self._offsets[self.count]]
+
+    def clear(self):
+        # Fresh arrays, so views handed out earlier keep their contents
+        self._points = np.zeros((0, 2))
+        self._edges = np.zeros((0, 4))
+        self._offsets = np.zeros(1, dtype=np.intp)
+        self.count = 0
+
+    def append(self, vertices):
+        """Append one polygon given as (n, 2) vertices"""
+        pts = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        self.extend(pts, [0, len(pts)])
+
+    def extend(self, points, offsets):
+        """Append flat-packed polygons: polygon i is points[offsets[i]:offsets[i+1]]"""
+        pts = np.asarray(points, dtype=float).reshape(-1, 2)
+        offsets = np.asarray(offsets, dtype=np.intp)
+        start = self._offsets[self.count]
+        end = start + len(pts)
+        count = self.count + len(offsets) - 1
+        self._points = _reserve(self._points, end, start)
+        self._edges = _reserve(self._edges, end, start)
+        self._offsets = _reserve(self._offsets, count + 1, self.count + 1)
+        self._points[start:end] = pts
+        self._edges[start:end] = polygon_edges(pts, offsets - offsets[0])
+        self._offsets[self.count + 1:count + 1] = start + offsets[1:] - offsets[0]
+        self.count = count
+
+
+class CountedEngine:
+    """Work counters shared by the line and polygon clipping engines; COUNTERS names them"""
+    name = 'engine'
+    COUNTERS = ()
+
+    def __init__(self):
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def reset_counters(self):
+        for key in self.counters:
+            self.counters[key] = 0
+
+
+class ClipEngine(CountedEngine):
+    """Common interface of the line clipping engines used by LineClipping.
+
+    Subclasses implement clip(window, x1, y1, x2, y2), which clips one segment
+    and returns (x1, y1, x2, y2, visible), and clip_batch(window, segments),
+    which clips an (N, 4) array and returns (clipped, visible). Both count their
+    work in `counters` so engines can be compared on the same line distribution.
+    """
+    COUNTERS = ('lines', 'iterations', 'divisions')
+
+
+class CohenSutherlandEngine(ClipEngine):
+    """Outcode-based clipping: one intersection and recode per pass"""
+    name = 'Cohen-Sutherland'
+
+    def clip(self, window, x1, y1, x2, y2):
+        """Cohen-Sutherland line clipping algorithm"""
+        counters = self.counters
+        counters['lines'] += 1
+        code1 = region_code(window, x1, y1)
+        code2 = region_code(window, x2, y2)
+        accept = False
+
+        while True:
+            counters['iterations'] += 1
+            # Both endpoints inside
+            if code1 == 0 and code2 == 0:
+                accept = True
+                break
+            # Both endpoints in same outside region
+            elif (code1 & code2) != 0:
+                break
+            else:
+                # Line needs clipping
+                x, y = 0.0, 0.0
+                # Pick an outside point
+                code_out = code1 if code1 != 0 else code2
+
+                # Find intersection point
+                counters['divisions'] += 1
+                if code_out & TOP:
+                    x = x1 + (x2 - x1) * (window['ymax'] - y1) / (y2 - y1)
+                    y = window['ymax']
+                elif code_out & BOTTOM:
+                    x = x1 + (x2 - x1) * (window['ymin'] - y1) / (y2 - y1)
+                    y = window['ymin']
+                elif code_out & RIGHT:
+                    y = y1 + (y2 - y1) * (window['xmax'] - x1) / (x2 - x1)
+                    x = window['xmax']
+                elif code_out & LEFT:
+                    y = y1 + (y2 - y1) * (window['xmin'] - x1) / (x2 - x1)
+                    x = window['xmin']
+
+                # Replace outside point with intersection point
+                if code_out == code1:
+                    x1, y1 = x, y
+                    code1 = region_code(window, x1, y1)
+                else:
+                    x2, y2 = x, y
+                    code2 = region_code(window, x2, y2)
+
+        if accept:
+            return (x1, y1, x2, y2, True)
+        else:
+            return (x1, y1, x2, y2, False)
+
+    def clip_batch(self, window, segments):
+        """Cohen-Sutherland clipping of an (N, 4) array of (x1, y1, x2, y2) segments at once.
+
+        Each pass resolves trivial accepts/rejects with outcode masks and moves one
+        outside endpoint of every remaining segment onto the window edge, exactly as
+        clip() does per line. Returns (clipped, visible): an (N, 4) float array of
+        clipped endpoints and a boolean mask of visible segments.
+        """
+        counters = self.counters
+        seg = np.array(segments, dtype=float).reshape(-1, 4)
+        counters['lines'] += len(seg)
+        x1, y1, x2, y2 = seg[:, 0], seg[:, 1], seg[:, 2], seg[:, 3]
+        xmin, xmax = window['xmin'], window['xmax']
+        ymin, ymax = window['ymin'], window['ymax']
+        code1 = region_codes(window, x1, y1)
+        code2 = region_codes(window, x2, y2)
+        visible = np.zeros(len(seg), dtype=bool)
+        active = np.ones(len(seg), dtype=bool)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            while True:
+                counters['iterations'] += int(np.count_nonzero(active))
+                # Both endpoints inside
+                accept = active & (code1 == 0) & (code2 == 0)
+                visible |= accept
+                # Both endpoints in same outside region
+                active &= ~accept & ((code1 & code2) == 0)
+                idx = np.flatnonzero(active)
+                if len(idx) == 0:
+                    break
+                counters['divisions'] += len(idx)
+
+                # Pick an outside point
+                c1 = code1[idx]
+                first = c1 != 0
+                code_out = np.where(first, c1, code2[idx])
+                ax, ay, bx, by = x1[idx], y1[idx], x2[idx], y2[idx]
+
+                # Find intersection point (same edge priority: top, bottom, right, left)
+                top = (code_out & TOP) != 0
+                horizontal = top | ((code_out & BOTTOM) != 0)
+                right = (code_out & RIGHT) != 0
+                y_edge = np.where(top, ymax, ymin)
+                x_edge = np.where(right, xmax, xmin)
+                x = np.where(horizontal, ax + (bx - ax) * (y_edge - ay) / (by - ay), x_edge)
+                y = np.where(horizontal, y_edge, ay + (by - ay) * (x_edge - ax) / (bx - ax))
+
+                # Replace outside point with intersection point
+                i1, i2 = idx[first], idx[~first]
+                x1[i1], y1[i1] = x[first], y[first]
+                x2[i2], y2[i2] = x[~first], y[~first]
+                code1[i1] = region_codes(window, x1[i1], y1[i1])
+                code2[i2] = region_codes(window, x2[i2], y2[i2])
+
+        return seg, visible
+
+
+class LiangBarskyEngine(ClipEngine):
+    """Parametric clipping: one pass over the four window edges per line"""
+    name = 'Liang-Barsky'
+
+    def clip(self, window, x1, y1, x2, y2):
+        counters = self.counters
+        counters['lines'] += 1
+        dx, dy = x2 - x1, y2 - y1
+        p = (-dx, dx, -dy, dy)
+        q = (x1 - window['xmin'], window['xmax'] - x1, y1 - window['ymin'], window['ymax'] - y1)
+        u1, u2 = 0.0, 1.0
+        for pk, qk in zip(p, q):
+            counters['iterations'] += 1
+            if pk == 0:
+                # Parallel to this edge: outside it means outside the window
+                if qk < 0:
+                    return (x1, y1, x2, y2, False)
+                continue
+            counters['divisions'] += 1
+            r = qk / pk
+            if pk < 0:
+                u1 = max(u1, r)
+            else:
+                u2 = min(u2, r)
+            if u1 > u2:
+                return (x1, y1, x2, y2, False)
+        return (x1 + u1 * dx, y1 + u1 * dy, x1 + u2 * dx, y1 + u2 * dy, True)
+
+    def clip_batch(self, window, segments):
+        counters = self.counters
+        seg = np.array(segments, dtype=float).reshape(-1, 4)
+        counters['lines'] += len(seg)
+        x1, y1 = seg[:, 0], seg[:, 1]
+        dx, dy = seg[:, 2] - x1, seg[:, 3] - y1
+        p = np.stack([-dx, dx, -dy, dy], axis=1)
+        q = np.stack([x1 - window['xmin'], window['xmax'] - x1,
+                      y1 - window['ymin'], window['ymax'] - y1], axis=1)
+        parallel = p == 0
+        counters['iterations'] += p.size
+        counters['divisions'] += int(np.count_nonzero(~parallel))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = q / p
+        u1 = np.max(np.where(p < 0, r, 0.0), axis=1)
+        u2 = np.min(np.where(p > 0, r, 1.0), axis=1)
+        visible = ~np.any(parallel & (q < 0), axis=1) & (u1 <= u2)
+        clipped = np.stack([x1 + u1 * dx, y1 + u1 * dy, x1 + u2 * dx, y1 + u2 * dy], axis=1)
+        return clipped, visible
+
+
+class CyrusBeckEngine(ClipEngine):
+    """Parametric clipping against any convex window given by its edge normals.
+
+    `polygon` is a counter-clockwise list of (x, y) vertices; when it is None the
+    rectangular clip window is used.
+    """
+    name = 'Cyrus-Beck'
+
+    def __init__(self, polygon=None):
+        super().__init__()
+        self.polygon = polygon
+
+    def edges(self, window):
+        """Return (points, inward_normals), one row per window edge"""
+        if self.polygon is None:
+            xmin, xmax = window['xmin'], window['xmax']
+            ymin, ymax = window['ymin'], window['ymax']
+            verts = np.array([(xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)], dtype=float)
+        else:
+            verts = np.asarray(self.polygon, dtype=float)
+        e = np.roll(verts, -1, axis=0) - verts
+        # Left-hand normal of each edge points inside a counter-clockwise polygon
+        return verts, np.stack([-e[:, 1], e[:, 0]], axis=1)
+
+    def clip(self, window, x1, y1, x2, y2):
+        counters = self.counters
+        counters['lines'] += 1
+        points, normals = self.edges(window)
+        dx, dy = x2 - x1, y2 - y1
+        t_enter, t_exit = 0.0, 1.0
+        for (px, py), (nx, ny) in zip(points.tolist(), normals.tolist()):
+            counters['iterations'] += 1
+            num = nx * (x1 - px) + ny * (y1 - py)
+            den = nx * dx + ny * dy
+            if den == 0:
+                if num < 0:
+                    return (x1, y1, x2, y2, False)
+                continue
+            counters['divisions'] += 1
+            t = -num / den
+            if den > 0:
+                t_enter = max(t_enter, t)
+            else:
+                t_exit = min(t_exit, t)
+            if t_enter > t_exit:
+                return (x1, y1, x2, y2, False)
+        return (x1 + t_enter * dx, y1 + t_enter * dy, x1 + t_exit * dx, y1 + t_exit * dy, True)
+
+    def clip_batch(self, window, segments):
+        counters = self.counters
+        seg = np.array(segments, dtype=float).reshape(-1, 4)
+        counters['lines'] += len(seg)
+        points, normals = self.edges(window)
+        x1, y1 = seg[:, 0], seg[:, 1]
+        dx, dy = seg[:, 2] - x1, seg[:, 3] - y1
+        # (N, E) numerators and denominators of the edge intersection parameters
+        num = (x1[:, None] - points[:, 0]) * normals[:, 0] + (y1[:, None] - points[:, 1]) * normals[:, 1]
+        den = dx[:, None] * normals[:, 0] + dy[:, None] * normals[:, 1]
+        parallel = den == 0
+        counters['iterations'] += num.size
+        counters['divisions'] += int(np.count_nonzero(~parallel))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = -num / den
+        t_enter = np.max(np.where(den > 0, t, 0.0), axis=1)
+        t_exit = np.min(np.where(den < 0, t, 1.0), axis=1)
+        visible = ~np.any(parallel & (num < 0), axis=1) & (t_enter <= t_exit)
+        clipped = np.stack([x1 + t_enter * dx, y1 + t_enter * dy, x1 + t_exit * dx, y1 + t_exit * dy], axis=1)
+        return clipped, visible
+
+
+class SutherlandHodgmanEngine(CountedEngine):
+    """Polygon clipping against the clip window, one window edge at a time.
+
+    Polygons travel as one batch in flat arrays: `points` (V, 2) holds every
+    vertex and polygon i is points[offsets[i]:offsets[i+1]]. Each pass clips
+    every edge of every polygon against one window edge (the LEFT, RIGHT,
+    BOTTOM and TOP region-code bits) with array operations, so the cost in
+    Python is four passes whatever the number of vertices. Concave polygons
+    come out as one polygon that may run along the window border.
+    """
+    name = 'Sutherland-Hodgman'
+    COUNTERS = ('polygons', 'iterations', 'divisions')
+    EDGES = (LEFT, RIGHT, BOTTOM, TOP)
+
+    def clip(self, window, polygon):
+        """Clip one polygon given as [(x, y), ...]; returns its clipped vertices as a list"""
+        points, _ = self.clip_batch(window, polygon, [0, len(polygon)])
+        return [tuple(p) for p in points.tolist()]
+
+    def clip_batch(self, window, points, offsets):
+        """Clip a batch of polygons; returns (points, offsets) in the same layout.
+
+        The output keeps one entry per input polygon; polygons entirely outside
+        the window come back with no vertices.
+        """
+        counters = self.counters
+        pts = np.array(points, dtype=float).reshape(-1, 2)
+        offsets = np.asarray(offsets, dtype=np.intp)
+        counters['polygons'] += len(offsets) - 1
+        for edge in self.EDGES:
+            pts, offsets = self._clip_edge(window, edge, pts, offsets)
+        return pts, offsets
+
+    def _clip_edge(self, window, edge, pts, offsets):
+        """One Sutherland-Hodgman pass of every polygon against the window edge `edge`"""
+        total = len(pts)
+        if total == 0:
+            return pts, offsets
+        self.counters['iterations'] += total
+        # Polygon edge i runs from vertex i to the next vertex of its polygon
+        nxt = next_vertex(offsets)
+        inside = (region_codes(window, pts[:, 0], pts[:, 1]) & edge) == 0
+        start, end = pts, pts[nxt]
+        enters = inside[nxt]
+        crosses = inside != enters
+        # Each polygon edge emits its crossing (if any), then its end vertex if that is inside
+        emitted = crosses.astype(np.intp) + enters
+        out = np.empty((int(emitted.sum()), 2))
+        position = np.cumsum(emitted) - emitted
+        idx = np.flatnonzero(crosses)
+        self.counters['divisions'] += len(idx)
+        a, b = start[idx], end[idx]
+        if edge & (LEFT | RIGHT):
+            x = window['xmin'] if edge == LEFT else window['xmax']
+            y = a[:, 1] + (b[:, 1] - a[:, 1]) * (x - a[:, 0]) / (b[:, 0] - a[:, 0])
+            out[position[idx]] = np.stack([np.full(len(idx), x), y], axis=1)
+        else:
+            y = window['ymin'] if edge == BOTTOM else window['ymax']
+            x = a[:, 0] + (b[:, 0] - a[:, 0]) * (y - a[:, 1]) / (b[:, 1] - a[:, 1])
+            out[position[idx]] = np.stack([x, np.full(len(idx), y)], axis=1)
+        keep = np.flatnonzero(enters)
+        out[position[keep] + crosses[keep]] = end[keep]
+        # New offsets: vertices emitted per polygon
+        counts = np.diff(offsets)
+        polygon = np.repeat(np.arange(len(counts)), counts)
+        emitted_per_polygon = np.bincount(polygon, weights=emitted, minlength=len(counts)).astype(np.intp)
+        return out, np.concatenate([[0], np.cumsum(emitted_per_polygon)])
@@ -0,0 +1,105 @@
+import argparse
+import os
+import time
+import numpy as np
+
+from clip_engines import CohenSutherlandEngine, LiangBarskyEngine, CyrusBeckEngine
+
+# Streaming line clipping for segment files larger than memory.
+#
+# The input is a headerless little-endian float32 file of (x1, y1, x2, y2) rows
+# (or a .npy array of shape (N, 4)). It is memory-mapped one fixed-size chunk at
+# a time, each chunk is clipped with an engine's clip_batch (Cohen-Sutherland by
+# default) and the visible clipped segments are appended to the output in the
+# same float32 row format, so memory use depends on the chunk size only.
+
+CHUNK_ROWS = 1 << 17  # segments per chunk (2 MiB of float32 input)
+ROW_BYTES = 4 * np.dtype(np.float32).itemsize
+ENGINES = {
+    'cohen-sutherland': CohenSutherlandEngine,
+    'liang-barsky': LiangBarskyEngine,
+    'cyrus-beck': CyrusBeckEngine,
+}
+
+
+def segment_count(path):
+    """Return (rows, byte offset of the first row) of a raw or .npy segment file"""
+    if path.endswith('.npy'):
+        arr = np.load(path, mmap_mode='r')
+        if arr.dtype != np.float32 or arr.ndim != 2 or arr.shape[1] != 4 or not arr.flags.c_contiguous:
+            raise ValueError(f"{path}: expected a C-ordered float32 (N, 4) array")
+        return arr.shape[0], arr.offset
+    size = os.path.getsize(path)
+    if size % ROW_BYTES:
+        raise ValueError(f"{path}: size {size} is not a multiple of {ROW_BYTES} bytes")
+    return size // ROW_BYTES, 0
+
+
+def iter_chunks(path, chunk=CHUNK_ROWS):
+    """Yield (first row, (m, 4) float32 memmap) for consecutive chunks of the file.
+
+    Every chunk is its own short-lived mapping, so pages of finished chunks are
+    released instead of accumulating in the process.
+    """
+    rows, offset = segment_count(path)
+    for start in range(0, rows, chunk):
+        m = min(chunk, rows - start)
+        yield start, np.memmap(path, dtype='<f4', mode='r', offset=offset + start * ROW_BYTES, shape=(m, 4))
+
+
+def clip_file(input_path, output_path, window, engine=None, chunk=CHUNK_ROWS, index_path=None):
+    """Clip every segment of input_path against `window`; append visible ones to output_path.
+
+    With `index_path`, the input row of every output segment is written there
+    as int64. Returns a dict of totals and timings.
+    """
+    engine = engine or CohenSutherlandEngine()
+    total = visible_total = 0
+    start_time = time.perf_counter()
+    index_file = open(index_path, 'wb') if index_path else None
+    try:
+        with open(output_path, 'wb') as out:
+            for first, segments in iter_chunks(input_path, chunk):
+                clipped, visible = engine.clip_batch(window, segments)
+                out.write(clipped[visible].astype('<f4').tobytes())
+                if index_file:
+                    index_file.write((first + np.flatnonzero(visible)).astype('<i8').tobytes())
+                total += len(segments)
+                visible_total += int(np.count_nonzero(visible))
+                del segments
+    finally:
+        if index_file:
+            index_file.close()
+    seconds = time.perf_counter() - start_time
+    return {
+        'segments': total,
+        'visible': visible_total,
+        'seconds': seconds,
+        'segments_per_second': total / seconds if seconds > 0 else float('inf'),
+        'counters': dict(engine.counters),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clip a float32 segment file against a window, chunk by chunk.")
+    parser.add_argument('input', help="raw float32 (x1, y1, x2, y2) rows, or a float32 (N, 4) .npy")
+    parser.add_argument('output', help="raw float32 file for the visible clipped segments")
+    parser.add_argument('--window', type=float, nargs=4, default=(-0.5, -0.5, 0.5, 0.5),
+                        metavar=('XMIN', 'YMIN', 'XMAX', 'YMAX'))
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='cohen-sutherland')
+    parser.add_argument('--chunk', type=int, default=CHUNK_ROWS, help="segments per chunk")
+    parser.add_argument('--index', help="also write the input row of every output segment (int64)")
+    args = parser.parse_args()
+
+    xmin, ymin, xmax, ymax = args.window
+    window = {'xmin': xmin, 'ymin': ymin, 'xmax': xmax, 'ymax': ymax}
+    stats = clip_file(args.input, args.output, window, ENGINES[args.engine](), args.chunk, args.index)
+    mb = stats['segments'] * ROW_BYTES / 1e6
+    print(f"{stats['segments']} segments, {stats['visible']} visible -> {args.output} "
+          f"in {stats['seconds']:.3f} s ({stats['segments_per_second']:.4g} segments/s, "
+          f"{mb / stats['seconds'] if stats['seconds'] > 0 else 0:.1f} MB/s)")
+    print("counters: " + ", ".join(f"{k}={v}" for k, v in stats['counters'].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,179 +2,357 @@ import pygame
 from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
+import numpy as np
+import math
+from gl_batch import BatchRenderer
+from glyph_atlas import GlyphAtlas, TextRenderer
+from frame_profiler import FrameProfiler
+from frame_scheduler import FrameScheduler, pygame_events
+from clip_engines import (region_code, region_codes, PolygonBatch, CohenSutherlandEngine,
+                          LiangBarskyEngine, CyrusBeckEngine, SutherlandHodgmanEngine)
 
-# Region codes for Cohen-Sutherland algorithm
-INSIDE = 0  # 0000
-LEFT = 1    # 0001
-RIGHT = 2   # 0010
-BOTTOM = 4  # 0100
-TOP = 8     # 1000
+class LineIndex:
+    """Uniform grid over the [-1, 1] view that buckets lines by their cell-aligned bounding box.
+    
+    Every line goes into the bucket (cx0, cy0, cx1, cy1) of the cells holding its
+    bounding-box corners; the outer cells extend to infinity so any coordinates fit.
+    A window change then classifies whole buckets: ones inside the window are
+    accepted, ones outside are dropped, and only lines in buckets straddling the
+    window border are tested (and clipped) one by one.
+    """
+    
+    def __init__(self, cells=16, bounds=(-1.0, 1.0)):
+        self.cells = cells
+        self._origin = bounds[0]
+        self._cell_size = (bounds[1] - bounds[0]) / cells
+        self.edges = bounds[0] + self._cell_size * np.arange(cells + 1)
+        self._segments = np.zeros((0, 4))
+        self._boxes = np.zeros((0, 4))  # xmin, ymin, xmax, ymax of every line
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._count = 0
+        self._buckets = None  # (order, starts, counts, bucket rects), rebuilt lazily
+    
+    def __len__(self):
+        return self._count
+    
+    @property
+    def segments(self):
+        return self._segments[:self._count]
+    
+    def add(self, line):
+        if self._count == len(self._segments):
+            cap = max(64, 2 * self._count)
+            for name in ('_segments', '_boxes', '_keys'):
+                old = getattr(self, name)
+                new = np.zeros((cap,) + old.shape[1:], dtype=old.dtype)
+                new[:self._count] = old[:self._count]
+                setattr(self, name, new)
+        x1, y1, x2, y2 = line
+        box = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        cx0, cy0, cx1, cy1 = (self._cell(v) for v in box)
+        n = self.cells
+        self._segments[self._count] = line
+        self._boxes[self._count] = box
+        self._keys[self._count] = ((cx0 * n + cy0) * n + cx1) * n + cy1
+        self._count += 1
+        self._buckets = None
+    
+    def clear(self):
+        self._count = 0
+        self._buckets = None
+    
+    def _cell(self, v):
+        i = math.floor((v - self._origin) / self._cell_size)
+        return min(max(i, 0), self.cells - 1)
+    
+    def _build(self):
+        keys = self._keys[:self._count]
+        order = np.argsort(keys, kind='stable')
+        bucket_keys, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        cx0, cy0, cx1, cy1 = np.unravel_index(bucket_keys, (self.cells,) * 4)
+        # Cell bounds with the outer edges pushed to infinity
+        lo = self.edges[:-1].copy()
+        hi = self.edges[1:].copy()
+        lo[0], hi[-1] = -np.inf, np.inf
+        rects = np.stack([lo[cx0], lo[cy0], hi[cx1], hi[cy1]], axis=1)
+        self._buckets = (order, starts, counts, rects)
+    
+    def classify(self, window):
+        """Return (inside, straddle) line indices for a clip window.
+        
+        `inside` lines lie entirely in the window and need no clipping; `straddle`
+        lines cross its border and must be clipped. All other lines are outside.
+        """
+        if self._count == 0:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+        if self._buckets is None:
+            self._build()
+        order, starts, counts, rects = self._buckets
+        xmin, ymin = window['xmin'], window['ymin']
+        xmax, ymax = window['xmax'], window['ymax']
+        inside = ((rects[:, 0] >= xmin) & (rects[:, 1] >= ymin) &
+                  (rects[:, 2] <= xmax) & (rects[:, 3] <= ymax))
+        outside = ((rects[:, 2] < xmin) | (rects[:, 0] > xmax) |
+                   (rects[:, 3] < ymin) | (rects[:, 1] > ymax))
+        straddle = ~inside & ~outside
+        inside_idx = order[self._ranges(starts[inside], counts[inside])]
+        # Lines in border buckets: test their own bounding boxes before clipping
+        border_idx = order[self._ranges(starts[straddle], counts[straddle])]
+        boxes = self._boxes[border_idx]
+        box_inside = ((boxes[:, 0] >= xmin) & (boxes[:, 1] >= ymin) &
+                      (boxes[:, 2] <= xmax) & (boxes[:, 3] <= ymax))
+        box_outside = ((boxes[:, 2] < xmin) | (boxes[:, 0] > xmax) |
+                       (boxes[:, 3] < ymin) | (boxes[:, 1] > ymax))
+        inside_idx = np.concatenate([inside_idx, border_idx[box_inside]])
+        return inside_idx, border_idx[~box_inside & ~box_outside]
+    
+    @staticmethod
+    def _ranges(starts, counts):
+        """Concatenate the index ranges [start, start + count) without a Python loop"""
+        total = int(counts.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.intp)
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return offsets + np.arange(total)
 
 class LineClipping:
+    MODES = ('draw_line', 'draw_polygon', 'resize_window')  # cycled with a right click
+    
     def __init__(self):
         self.clip_window = {'xmin': -0.5, 'ymin': -0.5, 'xmax': 0.5, 'ymax': 0.5}
         self.lines = []
+        self.index = LineIndex()  # grid over self.lines, kept in step by add_line/clear_lines
         self.current_line = None
         self.dragging_corner = None
-        self.mode = 'draw_line'  # 'draw_line' or 'resize_window'
+        self.mode = 'draw_line'  # one of MODES
+        self.engines = [CohenSutherlandEngine(), LiangBarskyEngine(), CyrusBeckEngine()]
+        self.engine = self.engines[0]
+        # Clipped copy of every line, valid while (window_generation, engine) == _clip_key
+        self.window_generation = 0
+        self.lines_version = 0  # bumped by add_line/clear_lines
+        self.renderer = BatchRenderer()
+        self._clip_key = None
+        self._clipped = np.zeros((0, 4))
+        self._visible = np.zeros(0, dtype=bool)
+        # Polygons packed flat: polygon i is polygon_points[polygon_offsets[i]:polygon_offsets[i+1]]
+        self.polygon_engine = SutherlandHodgmanEngine()
+        self.polygons = PolygonBatch()
+        self.polygons_version = 0  # bumped by add_polygon/clear_polygons
+        self.current_polygon = []  # vertices placed so far in 'draw_polygon' mode
+        self.polygon_cursor = None
+        # Clipped polygons, valid while (window_generation, polygons_version) == _polygon_clip_key
+        self._polygon_clip_key = None
+        self._clipped_polygons = PolygonBatch()
         
+    @property
+    def polygon_points(self):
+        return self.polygons.points
+    
+    @property
+    def polygon_offsets(self):
+        return self.polygons.offsets
+    
     def compute_code(self, x, y):
         """Compute region code for a point(x,y)"""
-        code = INSIDE
-        if x < self.clip_window['xmin']:
-            code |= LEFT
-        elif x > self.clip_window['xmax']:
-            code |= RIGHT
-        if y < self.clip_window['ymin']:
-            code |= BOTTOM
-        elif y > self.clip_window['ymax']:
-            code |= TOP
-        return code
+        return region_code(self.clip_window, x, y)
+    
+    def compute_codes(self, x, y):
+        """Compute region codes for arrays of points (vectorized compute_code)"""
+        return region_codes(self.clip_window, x, y)
+    
+    def cycle_engine(self):
+        """Switch to the next clipping engine and return it"""
+        i = self.engines.index(self.engine)
+        self.engine = self.engines[(i + 1) % len(self.engines)]
+        return self.engine
+    
+    def clip_line(self, x1, y1, x2, y2):
+        """Clip one line with the current engine; returns (x1, y1, x2, y2, visible)"""
+        return self.engine.clip(self.clip_window, x1, y1, x2, y2)
     
     def cohen_sutherland_clip(self, x1, y1, x2, y2):
         """Cohen-Sutherland line clipping algorithm"""
-        code1 = self.compute_code(x1, y1)
-        code2 = self.compute_code(x2, y2)
-        accept = False
+        return self.engines[0].clip(self.clip_window, x1, y1, x2, y2)
+    
+    def clip_batch(self, segments):
+        """Clip an (N, 4) array of segments with the current engine; returns (clipped, visible)"""
+        return self.engine.clip_batch(self.clip_window, segments)
+    
+    def clip_polygons(self, points, offsets):
+        """Clip flat-packed polygons against the clip window; returns (points, offsets)"""
+        return self.polygon_engine.clip_batch(self.clip_window, points, offsets)
+    
+    def cycle_mode(self):
+        """Switch to the next interaction mode and return it"""
+        self.mode = self.MODES[(self.MODES.index(self.mode) + 1) % len(self.MODES)]
+        return self.mode
+    
+    def move_corner(self, cx, cy, x, y):
+        """Move the clip window corner named by (cx, cy), e.g. ('xmin', 'ymax')"""
+        self.clip_window[cx] = x
+        self.clip_window[cy] = y
+        self.window_generation += 1
+    
+    def reset_window(self):
+        self.clip_window = {'xmin': -0.5, 'ymin': -0.5, 'xmax': 0.5, 'ymax': 0.5}
+        self.window_generation += 1
+    
+    def add_line(self, line):
+        """Store a line; if the clip cache is current, clip just this line into it.
         
-        while True:
-            # Both endpoints inside
-            if code1 == 0 and code2 == 0:
-                accept = True
-                break
-            # Both endpoints in same outside region
-            elif (code1 & code2) != 0:
-                break
-            else:
-                # Line needs clipping
-                x, y = 0.0, 0.0
-                # Pick an outside point
-                code_out = code1 if code1 != 0 else code2
-                
-                # Find intersection point
-                if code_out & TOP:
-                    x = x1 + (x2 - x1) * (self.clip_window['ymax'] - y1) / (y2 - y1)
-                    y = self.clip_window['ymax']
-                elif code_out & BOTTOM:
-                    x = x1 + (x2 - x1) * (self.clip_window['ymin'] - y1) / (y2 - y1)
-                    y = self.clip_window['ymin']
-                elif code_out & RIGHT:
-                    y = y1 + (y2 - y1) * (self.clip_window['xmax'] - x1) / (x2 - x1)
-                    x = self.clip_window['xmax']
-                elif code_out & LEFT:
-                    y = y1 + (y2 - y1) * (self.clip_window['xmin'] - x1) / (x2 - x1)
-                    x = self.clip_window['xmin']
-                
-                # Replace outside point with intersection point
-                if code_out == code1:
-                    x1, y1 = x, y
-                    code1 = self.compute_code(x1, y1)
-                else:
-                    x2, y2 = x, y
-                    code2 = self.compute_code(x2, y2)
+        Returns whether the line is visible in the current window.
+        """
+        self.lines.append(line)
+        self.index.add(line)
+        self.lines_version += 1
+        cx1, cy1, cx2, cy2, visible = self.clip_line(*line)
+        if self._clip_key == (self.window_generation, self.engine):
+            n = len(self.lines) - 1
+            if n == len(self._clipped):
+                cap = max(64, 2 * n)
+                clipped = np.zeros((cap, 4))
+                clipped[:n] = self._clipped[:n]
+                flags = np.zeros(cap, dtype=bool)
+                flags[:n] = self._visible[:n]
+                self._clipped, self._visible = clipped, flags
+            self._clipped[n] = (cx1, cy1, cx2, cy2)
+            self._visible[n] = visible
+        return visible
+    
+    def clear_lines(self):
+        self.lines = []
+        self.index.clear()
+        self.lines_version += 1
+        self._clip_key = None
+    
+    def add_polygon(self, vertices):
+        """Store a closed polygon; if the polygon clip cache is current, clip just this one into it.
         
-        if accept:
-            return (x1, y1, x2, y2, True)
-        else:
-            return (x1, y1, x2, y2, False)
+        Returns the number of vertices of its clipped part (0 if it is entirely outside).
+        """
+        pts = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        current = self._polygon_clip_key == (self.window_generation, self.polygons_version)
+        self.polygons.append(pts)
+        self.polygons_version += 1
+        clipped, _ = self.clip_polygons(pts, [0, len(pts)])
+        if current:
+            self._clipped_polygons.append(clipped)
+            self._polygon_clip_key = (self.window_generation, self.polygons_version)
+        return len(clipped)
+    
+    def clear_polygons(self):
+        self.polygons.clear()
+        self.current_polygon = []
+        self.polygon_cursor = None
+        self.polygons_version += 1
+        self._polygon_clip_key = None
+    
+    def clipped_polygons(self):
+        """Return cached (points, offsets) of all clipped polygons, re-clipping only after a change"""
+        key = (self.window_generation, self.polygons_version)
+        if self._polygon_clip_key != key:
+            self._clipped_polygons = PolygonBatch(*self.clip_polygons(self.polygon_points, self.polygon_offsets))
+            self._polygon_clip_key = key
+        return self._clipped_polygons.points, self._clipped_polygons.offsets
+    
+    def polygon_outlines(self):
+        """(E, 4) outline segments of the stored polygons, kept up to date by add_polygon"""
+        return self.polygons.edges
+    
+    def clipped_polygon_outlines(self):
+        """(E, 4) outline segments of the clipped polygons, cached with clipped_polygons()"""
+        self.clipped_polygons()
+        return self._clipped_polygons.edges
+    
+    def clipped_lines(self):
+        """Return cached (clipped, visible) for all lines, re-clipping only after a window change"""
+        key = (self.window_generation, self.engine)
+        if self._clip_key != key:
+            self._clipped, self._visible = self.clip_all()
+            self._clip_key = key
+        n = len(self.lines)
+        return self._clipped[:n], self._visible[:n]
     
-    def draw_grid_and_window(self):
+    def clip_all(self):
+        """Clip every stored line, using the grid index to skip lines fully inside or outside.
+        
+        Returns (clipped, visible) in the order of self.lines.
+        """
+        segments = self.index.segments
+        clipped = segments.copy()
+        visible = np.zeros(len(segments), dtype=bool)
+        inside, straddle = self.index.classify(self.clip_window)
+        visible[inside] = True
+        if len(straddle):
+            clipped[straddle], visible[straddle] = self.clip_batch(segments[straddle])
+        return clipped, visible
+    
+    def draw_grid_and_window(self, target):
         """Draw the clipping window and extended grid lines"""
         xmin, xmax = self.clip_window['xmin'], self.clip_window['xmax']
         ymin, ymax = self.clip_window['ymin'], self.clip_window['ymax']
+        corners = [(xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)]
+        generation = self.window_generation
         
-        # Draw extended grid lines (black, thin)
-        glColor3f(0.0, 0.0, 0.0)
-        glLineWidth(2)
-        
-        # Vertical lines
-        glBegin(GL_LINES)
-        # Left vertical line
-        glVertex2f(xmin, -1.0)
-        glVertex2f(xmin, 1.0)
-        # Right vertical line
-        glVertex2f(xmax, -1.0)
-        glVertex2f(xmax, 1.0)
-        glEnd()
-        
-        # Horizontal lines
-        glBegin(GL_LINES)
-        # Bottom horizontal line
-        glVertex2f(-1.0, ymin)
-        glVertex2f(1.0, ymin)
-        # Top horizontal line
-        glVertex2f(-1.0, ymax)
-        glVertex2f(1.0, ymax)
-        glEnd()
+        # Draw extended grid lines (black, thin): left, right, bottom, top
+        grid = [(xmin, -1.0, xmin, 1.0), (xmax, -1.0, xmax, 1.0),
+                (-1.0, ymin, 1.0, ymin), (-1.0, ymax, 1.0, ymax)]
+        target.lines('grid', grid, (0.0, 0.0, 0.0), 2, version=generation)
         
         # Draw clipping window (blue, thicker)
-        glColor3f(0.0, 0.0, 1.0)
-        glLineWidth(4)
-        glBegin(GL_LINE_LOOP)
-        glVertex2f(xmin, ymin)
-        glVertex2f(xmax, ymin)
-        glVertex2f(xmax, ymax)
-        glVertex2f(xmin, ymax)
-        glEnd()
+        target.line_loop('window', corners, (0.0, 0.0, 1.0), 4, version=generation)
         
         # Draw corner handles (yellow, only in resize mode)
         if self.mode == 'resize_window':
-            glPointSize(10)
-            glColor3f(1.0, 1.0, 0.0)
-            glBegin(GL_POINTS)
-            glVertex2f(xmin, ymin)
-            glVertex2f(xmax, ymin)
-            glVertex2f(xmax, ymax)
-            glVertex2f(xmin, ymax)
-            glEnd()
+            target.points('corners', corners, (1.0, 1.0, 0.0), 10, version=generation)
     
     def render(self):
         """Render all elements"""
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT | GL_STENCIL_BUFFER_BIT)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self.draw_scene(self.renderer)
+    
+    def draw_scene(self, target):
+        """Draw grid, window, polygons and lines through `target` (BatchRenderer or HeadlessRenderer)"""
         # Draw grid and clipping window first
-        self.draw_grid_and_window()
+        self.draw_grid_and_window(target)
+        
+        # Draw polygons: original outlines (red), clipped parts filled and outlined (green)
+        if len(self.polygon_offsets) > 1:
+            target.lines('polygons', self.polygon_outlines(), (1.0, 0.0, 0.0, 0.6), 2,
+                         version=self.polygons_version)
+            points, offsets = self.clipped_polygons()
+            target.polygons('clipped_fill', points, offsets, (0.0, 0.8, 0.0, 0.35),
+                            version=self._polygon_clip_key)
+            target.lines('clipped_polygons', self.clipped_polygon_outlines(), (0.0, 0.8, 0.0), 3,
+                         version=self._polygon_clip_key)
         
         # Draw all original lines (red, semi-transparent)
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-        for line in self.lines:
-            x1, y1, x2, y2 = line
-            glColor4f(1.0, 0.0, 0.0, 0.6)
-            glLineWidth(2)
-            glBegin(GL_LINES)
-            glVertex2f(x1, y1)
-            glVertex2f(x2, y2)
-            glEnd()
+        if self.lines:
+            target.lines('lines', self.index.segments, (1.0, 0.0, 0.0, 0.6), 2,
+                         version=self.lines_version)
         
         # Draw clipped portions (green, thick)
-        for line in self.lines:
-            x1, y1, x2, y2 = line
-            cx1, cy1, cx2, cy2, visible = self.cohen_sutherland_clip(x1, y1, x2, y2)
-            if visible:
-                glColor3f(0.0, 0.8, 0.0)
-                glLineWidth(5)
-                glBegin(GL_LINES)
-                glVertex2f(cx1, cy1)
-                glVertex2f(cx2, cy2)
-                glEnd()
+        if self.lines:
+            clipped, visible = self.clipped_lines()
+            target.lines('clipped', clipped[visible], (0.0, 0.8, 0.0), 5,
+                         version=(self._clip_key, self.lines_version))
         
         # Draw current line being drawn (yellow preview)
         if self.current_line:
             x1, y1, x2, y2 = self.current_line
-            glColor3f(1.0, 1.0, 0.0)
-            glLineWidth(3)
-            glBegin(GL_LINES)
-            glVertex2f(x1, y1)
-            glVertex2f(x2, y2)
-            glEnd()
+            target.lines('preview', [self.current_line], (1.0, 1.0, 0.0), 3)
             
             # Show endpoints
-            glPointSize(8)
-            glBegin(GL_POINTS)
-            glVertex2f(x1, y1)
-            glVertex2f(x2, y2)
-            glEnd()
+            target.points('preview_ends', [(x1, y1), (x2, y2)], (1.0, 1.0, 0.0), 8)
+        
+        # Draw the polygon being placed (yellow), rubber-banded to the cursor
+        if self.current_polygon:
+            preview = self.current_polygon + ([self.polygon_cursor] if self.polygon_cursor else [])
+            target.polyline('polygon_preview', preview, (1.0, 1.0, 0.0), 3)
+            target.points('polygon_preview_points', self.current_polygon, (1.0, 1.0, 0.0), 8)
 
 def screen_to_world(x, y, width, height):
     """Convert screen coordinates to world coordinates"""
@@ -188,12 +366,10 @@ def world_to_screen(x, y, width, height):
     screen_y = int((1 - y) * height / 2)
     return screen_x, screen_y
 
-def draw_region_codes(screen, clipper, display):
-    """Draw region codes using Pygame on the display"""
-    font = pygame.font.Font(None, 36)
-    
-    xmin, xmax = clipper.clip_window['xmin'], clipper.clip_window['xmax']
-    ymin, ymax = clipper.clip_window['ymin'], clipper.clip_window['ymax']
+def region_label_positions(clip_window):
+    """Return (code, world x, world y) for the centre of each of the nine regions"""
+    xmin, xmax = clip_window['xmin'], clip_window['xmax']
+    ymin, ymax = clip_window['ymin'], clip_window['ymax']
     
     # Calculate center positions for each region (in world coordinates)
     x_left = (xmin - 1.0) / 2
@@ -205,7 +381,7 @@ def draw_region_codes(screen, clipper, display):
     y_bottom = (ymin - 1.0) / 2
     
     # Region codes and their positions
-    regions = [
+    return [
         ("1001", x_left, y_top),      # Top-Left
         ("1000", x_center, y_top),    # Top
         ("1010", x_right, y_top),     # Top-Right
@@ -216,12 +392,52 @@ def draw_region_codes(screen, clipper, display):
         ("0100", x_center, y_bottom), # Bottom
         ("0110", x_right, y_bottom),  # Bottom-Right
     ]
+
+class RegionLabelOverlay:
+    """Region code labels drawn from a glyph atlas on top of the scene.
+    
+    The glyphs are rasterized once into a texture and all nine labels share one
+    vertex buffer through TextRenderer; the label positions are recomputed only
+    when the clip window generation changes, so a frame costs one draw call and
+    no framebuffer readback.
+    """
+    
+    def __init__(self, display):
+        self.display = display
+        self.text = TextRenderer(GlyphAtlas(None, 36))
+        self._generation = None
+        self._lines = ()
+    
+    def _layout(self, clipper):
+        """Centre each label on its region, snapped to whole pixels (y up, as TextRenderer draws)"""
+        width, height = self.display
+        atlas = self.text.atlas
+        lines = []
+        for code, wx, wy in region_label_positions(clipper.clip_window):
+            sx, sy = world_to_screen(wx, wy, width, height)
+            left = sx - int(atlas.text_width(code)) // 2
+            # The glyph boxes run from baseline + descent to baseline + descent + height
+            baseline = height - sy - atlas.height // 2 - atlas.descent
+            lines.append((left, baseline, code))
+        self._lines = tuple(lines)
+        self._generation = clipper.window_generation
     
-    for code, wx, wy in regions:
-        sx, sy = world_to_screen(wx, wy, display[0], display[1])
-        text_surface = font.render(code, True, (0, 0, 0))
-        text_rect = text_surface.get_rect(center=(sx, sy))
-        screen.blit(text_surface, text_rect)
+    def draw(self, clipper):
+        if self._generation != clipper.window_generation:
+            self._layout(clipper)
+        width, height = self.display
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, width, 0, height, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        self.text.draw('region_labels', self._lines, (0.0, 0.0, 0.0))
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
 
 def main():
     try:
@@ -229,9 +445,11 @@ def main():
         pygame.init()
         display = (1000, 700)
         
-        # Create window with OpenGL context
-        screen = pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
-        pygame.display.set_caption("Cohen-Sutherland Line Clipping Algorithm")
+        # Create window with OpenGL context (the stencil buffer fills concave polygons)
+        pygame.display.gl_set_attribute(pygame.GL_STENCIL_SIZE, 8)
+        pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
+        caption = "Cohen-Sutherland Line Clipping Algorithm"
+        pygame.display.set_caption(caption)
         
         # Setup OpenGL viewport and projection
         glViewport(0, 0, display[0], display[1])
@@ -257,18 +475,28 @@ def main():
         drawing = False
         start_pos = None
         
-        # Create a surface for 2D overlay
-        overlay = pygame.Surface(display, pygame.SRCALPHA)
+        # Region code labels, composited in GL
+        labels = RegionLabelOverlay(display)
+        
+        # Frame timings, shown in the caption with P (FRAME_TRACE=path records a trace)
+        profiler = FrameProfiler('csw')
+        
+        # Redraw only when something changed; sleep on the event queue otherwise
+        scheduler = FrameScheduler()
         
         print("\n" + "="*60)
         print("COHEN-SUTHERLAND LINE CLIPPING ALGORITHM")
         print("="*60)
         print("\n📋 CONTROLS:")
         print("  ➤ Left Click & Drag   : Draw a line")
-        print("  ➤ Right Click         : Toggle Draw/Resize mode")
-        print("  ➤ C Key              : Clear all lines")
+        print("  ➤ Right Click         : Cycle Draw line / Draw polygon / Resize mode")
+        print("  ➤ Left Click (polygon): Add a polygon vertex")
+        print("  ➤ Enter Key          : Close the polygon being drawn")
+        print("  ➤ C Key              : Clear all lines and polygons")
         print("  ➤ R Key              : Reset clipping window")
         print("  ➤ I Key              : Input line coordinates")
+        print("  ➤ E Key              : Switch clipping engine (Cohen-Sutherland / Liang-Barsky / Cyrus-Beck)")
+        print("  ➤ P Key              : Toggle frame timings in the title bar")
         print("  ➤ ESC Key            : Exit")
         print("\n📊 REGION CODES:")
         print("  • 0000 = Inside (center)")
@@ -279,26 +507,54 @@ def main():
         print("  • Yellow line: Preview (while drawing)")
         print("  • Red line: Original line")
         print("  • Green line: Clipped visible portion")
+        print("  • Green fill: Clipped polygon (Sutherland-Hodgman)")
         print("  • Blue rectangle: Clipping window")
         print("  • Black lines: Extended grid")
         print("\n✨ Ready! Start drawing lines...\n")
         
         while running:
-            for event in pygame.event.get():
+            events = pygame_events(scheduler, fps=60, clock=clock)
+            profiler.begin_frame()
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                     print("\n👋 Exiting program...")
                 
                 elif event.type == pygame.KEYDOWN:
+                    scheduler.invalidate()
                     if event.key == pygame.K_ESCAPE:
                         running = False
                         print("\n👋 Exiting program...")
                     elif event.key == pygame.K_c:
-                        clipper.lines = []
-                        print("🗑️  All lines cleared")
+                        clipper.clear_lines()
+                        clipper.clear_polygons()
+                        print("🗑️  All lines and polygons cleared")
+                    elif event.key == pygame.K_RETURN:
+                        if len(clipper.current_polygon) >= 3:
+                            count = clipper.add_polygon(clipper.current_polygon)
+                            if count:
+                                print(f"✅ Polygon added: VISIBLE ({count} clipped vertices)")
+                            else:
+                                print("❌ Polygon added: COMPLETELY OUTSIDE")
+                        else:
+                            print("❌ A polygon needs at least 3 vertices")
+                        clipper.current_polygon = []
+                        clipper.polygon_cursor = None
                     elif event.key == pygame.K_r:
-                        clipper.clip_window = {'xmin': -0.5, 'ymin': -0.5, 'xmax': 0.5, 'ymax': 0.5}
+                        clipper.reset_window()
                         print("🔄 Clipping window reset to default")
+                    elif event.key == pygame.K_e:
+                        print("📈 Engine counters so far:")
+                        for engine in clipper.engines + [clipper.polygon_engine]:
+                            counts = ", ".join(f"{k}={v}" for k, v in engine.counters.items())
+                            print(f"  • {engine.name:<17}: {counts}")
+                        engine = clipper.cycle_engine()
+                        caption = f"{engine.name} Line Clipping Algorithm"
+                        pygame.display.set_caption(caption)
+                        print(f"⚙️  Engine: {engine.name}")
+                    elif event.key == pygame.K_p:
+                        if not profiler.toggle_overlay():
+                            pygame.display.set_caption(caption)
                     elif event.key == pygame.K_i:
                         # Input line coordinates from console
                         print("\n" + "="*50)
@@ -312,10 +568,8 @@ def main():
                             y2 = float(input("Enter y2: "))
                             
                             line = (x1, y1, x2, y2)
-                            clipper.lines.append(line)
-                            
                             # Check if line is inside/outside
-                            _, _, _, _, visible = clipper.cohen_sutherland_clip(*line)
+                            visible = clipper.add_line(line)
                             if visible:
                                 print(f"✅ Line ({x1:.2f},{y1:.2f}) to ({x2:.2f},{y2:.2f}): VISIBLE")
                             else:
@@ -325,6 +579,7 @@ def main():
                         print("="*50 + "\n")
                 
                 elif event.type == pygame.MOUSEBUTTONDOWN:
+                    scheduler.invalidate()
                     if event.button == 1:  # Left click
                         mx, my = pygame.mouse.get_pos()
                         world_x, world_y = screen_to_world(mx, my, display[0], display[1])
@@ -332,6 +587,8 @@ def main():
                         if clipper.mode == 'draw_line':
                             drawing = True
                             start_pos = (world_x, world_y)
+                        elif clipper.mode == 'draw_polygon':
+                            clipper.current_polygon.append((world_x, world_y))
                         elif clipper.mode == 'resize_window':
                             # Check if clicking on a corner
                             threshold = 0.05
@@ -348,23 +605,23 @@ def main():
                                     break
                     
                     elif event.button == 3:  # Right click
-                        if clipper.mode == 'draw_line':
-                            clipper.mode = 'resize_window'
+                        mode = clipper.cycle_mode()
+                        if mode == 'resize_window':
                             print("🔧 Mode: RESIZE WINDOW (drag yellow corner handles)")
+                        elif mode == 'draw_polygon':
+                            print("🔷 Mode: DRAW POLYGON (click vertices, Enter to close)")
                         else:
-                            clipper.mode = 'draw_line'
                             print("✏️  Mode: DRAW LINE")
                 
                 elif event.type == pygame.MOUSEBUTTONUP:
+                    scheduler.invalidate()
                     if event.button == 1:
                         if drawing and start_pos:
                             mx, my = pygame.mouse.get_pos()
                             world_x, world_y = screen_to_world(mx, my, display[0], display[1])
                             line = (start_pos[0], start_pos[1], world_x, world_y)
-                            clipper.lines.append(line)
-                            
                             # Check if line is inside/outside
-                            _, _, _, _, visible = clipper.cohen_sutherland_clip(*line)
+                            visible = clipper.add_line(line)
                             if visible:
                                 print(f"✅ Line added: VISIBLE (inside or intersecting)")
                             else:
@@ -382,31 +639,41 @@ def main():
                     
                     if drawing and start_pos:
                         clipper.current_line = (start_pos[0], start_pos[1], world_x, world_y)
+                        scheduler.invalidate()
+                    
+                    if clipper.mode == 'draw_polygon' and clipper.current_polygon:
+                        clipper.polygon_cursor = (world_x, world_y)
+                        scheduler.invalidate()
                     
                     if clipper.dragging_corner:
                         cx, cy = clipper.dragging_corner
-                        clipper.clip_window[cx] = world_x
-                        clipper.clip_window[cy] = world_y
+                        clipper.move_corner(cx, cy, world_x, world_y)
+                        scheduler.invalidate()
             
-            # Render OpenGL scene
-            clipper.render()
+            if not scheduler.frame_due():
+                profiler.cancel_frame()
+                continue
             
-            # Read pixels from OpenGL buffer
-            glReadBuffer(GL_BACK)
-            pixels = glReadPixels(0, 0, display[0], display[1], GL_RGB, GL_UNSIGNED_BYTE)
-            gl_surface = pygame.image.fromstring(pixels, display, "RGB")
-            gl_surface = pygame.transform.flip(gl_surface, False, True)
+            # Clip (cached until the lines or window change)
+            with profiler.phase('clipping'):
+                clipper.clipped_lines()
+                clipper.clipped_polygons()
             
-            # Create a new screen surface and draw everything
-            screen = pygame.display.get_surface()
-            screen.blit(gl_surface, (0, 0))
+            # Render OpenGL scene
+            with profiler.phase('gl'):
+                clipper.render()
             
-            # Draw region codes on top using Pygame
-            draw_region_codes(screen, clipper, display)
+            # Draw region codes on top of the scene
+            with profiler.phase('text'):
+                labels.draw(clipper)
             
             # Update display
-            pygame.display.flip()
-            clock.tick(60)
+            with profiler.phase('flip'):
+                pygame.display.flip()
+            scheduler.frame_drawn()
+            profiler.end_frame()
+            if profiler.show_overlay and profiler.title_due():
+                pygame.display.set_caption(f"{caption} | {profiler.overlay_title()}")
         
         pygame.quit()
         print("✅ Program closed successfully\n")
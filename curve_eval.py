@@ -0,0 +1,262 @@
+import numpy as np
+from functools import lru_cache
+from bspline_spans import bernstein_matrix
+from forward_diff import forward_difference, piecewise_forward_difference
+
+# Curve evaluation kernels shared by the demos and the offline tools.
+#
+# bezier_curve.py, bspline.py and bsplines.py draw with these, and
+# tessellate.py, bench.py and forward_diff.py call them directly. Nothing here
+# imports GL, GLUT, pygame or glfw, so worker processes and headless runs load
+# only NumPy.
+
+DEFAULT_RESOLUTION = 400  # Bezier samples when none are given (as in bezier_curve.py)
+BASIS_CACHE_SIZE = 32  # basis matrices kept alive (one per degree/point count/knot vector)
+
+
+# ----------------- Bezier curves (bezier_curve.py) -----------------
+def bezier_point(ctrl_pts, t):
+    """Compute a point on Bezier curve at parameter t using de Casteljau (iterative)."""
+    # Make a local copy of points as floats
+    pts = [(float(x), float(y)) for (x,y) in ctrl_pts]
+    n = len(pts)
+    if n == 0:
+        return None
+    # de Casteljau iterative reduction
+    for r in range(1, n):
+        for i in range(n - r):
+            x = (1 - t) * pts[i][0] + t * pts[i+1][0]
+            y = (1 - t) * pts[i][1] + t * pts[i+1][1]
+            pts[i] = (x, y)
+    return pts[0]
+
+
+def bezier_points(ctrl_pts, resolution=DEFAULT_RESOLUTION):
+    """Evaluate the Bezier curve at t = 0, 1/resolution, ..., 1 in one matrix product.
+
+    Returns a (resolution+1, 2) float array (empty if there are no control points).
+    """
+    pts = np.asarray(ctrl_pts, dtype=float).reshape(-1, 2)
+    if len(pts) == 0:
+        return np.empty((0, 2))
+    return bernstein_matrix(len(pts) - 1, resolution) @ pts
+
+
+def de_casteljau(ctrl_pts, t):
+    """Evaluate the curve at every parameter in t with de Casteljau's algorithm; returns (len(t), 2)"""
+    pts = np.asarray(ctrl_pts, dtype=float).reshape(-1, 2)
+    t = np.asarray(t, dtype=float).reshape(-1, 1, 1)
+    work = np.broadcast_to(pts, (len(t),) + pts.shape)
+    for _ in range(len(pts) - 1):
+        work = (1.0 - t) * work[:, :-1] + t * work[:, 1:]
+    return work[:, 0]
+
+
+def bezier_points_forward(ctrl_pts, resolution=DEFAULT_RESOLUTION, block=None):
+    """Same samples as bezier_points, by forward differencing re-anchored every `block` samples.
+
+    Each sample costs `degree` additions. The default block shrinks with the
+    degree to bound rounding drift, so this pays off for low-degree curves at
+    high sample counts and degrades to de Casteljau for high degrees.
+    """
+    pts = np.asarray(ctrl_pts, dtype=float).reshape(-1, 2)
+    if len(pts) == 0:
+        return np.empty((0, 2))
+    return forward_difference(lambda i: de_casteljau(pts, i / resolution), len(pts) - 1, resolution + 1, block)
+
+
+def elevate_degree(ctrl_pts):
+    """Control points of the same curve one degree higher (one more point).
+
+    Q[i] = i/(n+1) P[i-1] + (1 - i/(n+1)) P[i] for i = 0..n+1, so the end points
+    stay put and every inner point moves towards the curve; returns (n+2, 2).
+    """
+    pts = np.asarray(ctrl_pts, dtype=float).reshape(-1, 2)
+    if len(pts) == 0:
+        return pts
+    a = (np.arange(len(pts) + 1) / len(pts))[:, None]
+    padded = np.concatenate([pts[:1], pts, pts[-1:]])
+    return a * padded[:-1] + (1.0 - a) * padded[1:]
+
+
+# ----------------- Clamped B-splines with De Boor (bspline.py) -----------------
+def bspline(control_points, degree=3, num_points=200, evaluator='de_boor', block=None):
+    """Sample the curve at num_points uniform parameters.
+
+    evaluator='forward' runs forward differencing inside each knot span,
+    re-anchored with De Boor every `block` samples.
+    """
+    n = len(control_points) - 1
+    if n < degree:
+        return np.array([])  # Not enough points for the curve
+
+    k = degree
+    m = n + k + 1
+
+    # Uniform knot vector
+    knots = np.array([0] * (k + 1) + list(range(1, m - 2 * k)) + [m - 2 * k] * (k + 1), dtype=float)
+    knots = knots / max(knots)
+
+    u = np.linspace(0, 1, num_points)
+    if evaluator == 'forward':
+        spans = np.clip(np.searchsorted(knots, u, side='right') - 1, k, n)
+        return piecewise_forward_difference(
+            u, spans, lambda sp, x: de_boor_batch(k, x, knots, control_points, spans=sp), k, block)
+    return de_boor_batch(k, u, knots, control_points)
+
+
+def de_boor_batch(k, u, knots, control_points, out=None, spans=None):
+    """Evaluate the B-spline at every parameter in u at once with De Boor's algorithm.
+
+    Knot spans are found with one sorted search and the triangular recurrence runs
+    over arrays shaped (len(u), k+1, dim). The result is written into `out`
+    (allocated as a (len(u), dim) float array if not given). Passing `spans`
+    evaluates each parameter on that span's polynomial, even outside the span.
+    """
+    c = np.asarray(control_points, dtype=float)
+    n = len(c) - 1
+    u = np.asarray(u, dtype=float)
+    # Find knot spans: t[i] <= x < t[i+1], with the end of the domain in the last span
+    if spans is None:
+        spans = np.clip(np.searchsorted(knots, u, side='right') - 1, k, n)
+    d = c[spans[:, None] - k + np.arange(k + 1)]
+    for r in range(1, k + 1):
+        j = np.arange(r, k + 1)
+        lo = knots[spans[:, None] + j - k]
+        hi = knots[spans[:, None] + j + 1 - r]
+        alpha = ((u[:, None] - lo) / (hi - lo))[:, :, None]
+        d[:, r:] = (1.0 - alpha) * d[:, r - 1:k] + alpha * d[:, r:]
+    if out is None:
+        out = np.empty((len(u), c.shape[1]))
+    out[:] = d[:, k]
+    return out
+
+
+# ----------------- Uniform B-splines with basis functions (bsplines.py) -----------------
+def find_span(n, k, t, knot):
+    """Knot span index i with knot[i] <= t < knot[i+1], kept inside the domain [k, n]"""
+    if t >= knot[n + 1]:
+        return n
+    i = int(np.searchsorted(knot, t, side='right')) - 1
+    return min(max(i, k), n)
+
+
+def find_spans(n, k, t, knot):
+    """find_span for an array of parameters, with one sorted search"""
+    return np.clip(np.searchsorted(knot, t, side='right') - 1, k, n)
+
+
+def basis_functions(i, k, t, knot):
+    """All non-zero basis functions N[i-k..i] at t in span i, in one triangular pass"""
+    N = [1.0] + [0.0] * k
+    left = [0.0] * (k + 1)
+    right = [0.0] * (k + 1)
+    for j in range(1, k + 1):
+        left[j] = t - knot[i + 1 - j]
+        right[j] = knot[i + j] - t
+        saved = 0.0
+        for r in range(j):
+            temp = N[r] / (right[r + 1] + left[j - r])
+            N[r] = saved + right[r + 1] * temp
+            saved = left[j - r] * temp
+        N[j] = saved
+    return N
+
+
+def basis_functions_batch(spans, k, t, knot):
+    """basis_functions for every (spans[j], t[j]) at once; returns (len(t), k+1)
+
+    The same triangular pass, run over arrays, so the values match the scalar
+    version exactly and t may lie outside its span (extrapolating that piece).
+    """
+    spans = np.asarray(spans, dtype=np.intp)
+    t = np.asarray(t, dtype=float)
+    knot = np.asarray(knot, dtype=float)
+    N = np.zeros((len(t), k + 1))
+    N[:, 0] = 1.0
+    left = np.zeros((k + 1, len(t)))
+    right = np.zeros((k + 1, len(t)))
+    for j in range(1, k + 1):
+        left[j] = t - knot[spans + 1 - j]
+        right[j] = knot[spans + j] - t
+        saved = np.zeros(len(t))
+        for r in range(j):
+            temp = N[:, r] / (right[r + 1] + left[j - r])
+            N[:, r] = saved + right[r + 1] * temp
+            saved = left[j - r] * temp
+        N[:, j] = saved
+    return N
+
+
+def cox_de_boor(i, k, t, knot):
+    """Recursive definition of B-spline basis function"""
+    if k == 0:
+        return 1.0 if knot[i] <= t < knot[i + 1] else 0.0
+    left = 0.0
+    right = 0.0
+    if knot[i + k] - knot[i] != 0:
+        left = ((t - knot[i]) / (knot[i + k] - knot[i])) * cox_de_boor(i, k - 1, t, knot)
+    if knot[i + k + 1] - knot[i + 1] != 0:
+        right = ((knot[i + k + 1] - t) / (knot[i + k + 1] - knot[i + 1])) * cox_de_boor(i + 1, k - 1, t, knot)
+    return left + right
+
+
+def bspline_basis(i, k, t, knot):
+    """Basis function N[i,k] at t.
+
+    Inside the curve domain [knot[k], knot[n+1]] (closed at the end, so the last
+    curve sample is not lost) it comes from one triangular pass; outside it the
+    recursive definition gives each function's full support.
+    """
+    n = len(knot) - k - 2
+    if t < knot[k] or t > knot[n + 1]:
+        return cox_de_boor(i, k, t, knot)
+    span = find_span(n, k, t, knot)
+    if not span - k <= i <= span:
+        return 0.0
+    return basis_functions(span, k, t, knot)[i - span + k]
+
+
+@lru_cache(maxsize=BASIS_CACHE_SIZE)
+def basis_matrix(n, k, num_points, knot):
+    """(num_points, n+1) matrix of basis values at the sample parameters; `knot` is a tuple
+
+    Spans come from one sorted search and the triangular pass runs over all
+    rows at once. bspline_curve uses it for one-shot sampling (tessellate.py,
+    bench.py); the bsplines.py window draws through IncrementalBSpline instead.
+    """
+    knot = np.asarray(knot, dtype=float)
+    t_values = np.linspace(knot[k], knot[n + 1], num_points)
+    spans = find_spans(n, k, t_values, knot)
+    basis = np.zeros((num_points, n + 1))
+    rows = np.arange(num_points)[:, None]
+    basis[rows, spans[:, None] - k + np.arange(k + 1)] = basis_functions_batch(spans, k, t_values, knot)
+    basis.flags.writeable = False
+    return basis
+
+
+def bspline_curve(control_points, degree=3, num_points=100, evaluator='basis', block=None):
+    """Sample the curve as one product with the cached basis matrix; returns (num_points, 2)
+
+    evaluator='forward' instead runs forward differencing inside each knot span,
+    re-anchored from the basis functions every `block` samples.
+    """
+    n = len(control_points) - 1
+    k = degree
+    m = n + k + 1  # number of knots
+    # Uniform knot vector
+    knot = np.linspace(0, 1, m + 1)
+
+    pts = np.asarray(control_points, dtype=float)[:, :2]
+    if evaluator == 'forward':
+        t_values = np.linspace(knot[k], knot[n + 1], num_points)
+        spans = find_spans(n, k, t_values, knot)
+        return piecewise_forward_difference(t_values, spans, lambda sp, t: span_points(sp, k, t, knot, pts), k, block)
+    return basis_matrix(n, k, num_points, tuple(knot.tolist())) @ pts
+
+
+def span_points(spans, k, t_values, knot, pts):
+    """Evaluate the polynomial piece of span spans[j] at t_values[j] (extrapolating past the span)"""
+    basis = basis_functions_batch(spans, k, t_values, knot)
+    windows = pts[spans[:, None] - k + np.arange(k + 1)]
+    return np.einsum('mj,mjd->md', basis, windows)
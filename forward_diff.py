@@ -0,0 +1,154 @@
+import argparse
+import math
+import time
+import numpy as np
+
+# Forward differencing for uniformly sampled polynomial curve segments.
+#
+# A degree-d polynomial sampled at equal steps has a constant d-th forward
+# difference, so once the difference table is known every further sample costs d
+# additions. Rounding errors compound as the additions run on, so the table is
+# rebuilt from exact evaluations (de Casteljau / de Boor) every `block` samples.
+
+REANCHOR_INTERVAL = 64   # most samples between exact re-evaluations of the difference table
+DRIFT_TOLERANCE = 1e-9   # worst-case drift allowed within a block, relative to the coordinates
+
+
+def stable_block(degree, max_block=REANCHOR_INTERVAL, tolerance=DRIFT_TOLERANCE):
+    """Longest block (<= max_block) whose drift bound stays under `tolerance`.
+
+    Differencing d+1 anchors amplifies their rounding by up to 2**d, and step j
+    of a block adds the d-th difference C(j, d) times, so the bound is
+    2**d * C(block-1, d) * eps. It falls quickly with the degree, which is why
+    high-degree curves get short blocks.
+    """
+    eps = np.finfo(float).eps
+    block = max_block
+    while block > 1 and 2 ** degree * math.comb(block - 1, degree) * eps > tolerance:
+        block -= 1
+    return block
+
+
+def difference_blocks(anchor, block):
+    """Advance the difference tables of many blocks at once.
+
+    `anchor` is (blocks, degree+1, dim): exact values at the first degree+1
+    steps of every block. Returns (blocks, block, dim) samples, each block
+    continued from its own table with one running sum per order.
+    """
+    degree = anchor.shape[1] - 1
+    # Leading differences D^0..D^d at every block start
+    table = [anchor[:, 0]]
+    diff = anchor
+    for _ in range(degree):
+        diff = diff[:, 1:] - diff[:, :-1]
+        table.append(diff[:, 0])
+    values = np.broadcast_to(table[degree][:, None], (len(anchor), block) + anchor.shape[2:])
+    for k in range(degree - 1, -1, -1):
+        # D^k[j] = D^k[0] + D^(k+1)[0] + ... + D^(k+1)[j-1], summed in order
+        acc = np.empty(values.shape)
+        acc[:, 0] = table[k]
+        acc[:, 1:] = values[:, :-1]
+        np.cumsum(acc, axis=1, out=acc)
+        values = acc
+    return values
+
+
+def forward_difference(exact, degree, count, block=None):
+    """Samples 0..count-1 of a degree-`degree` polynomial by forward differencing.
+
+    `exact(idx)` must return the exact values, shape (len(idx), dim), at integer
+    sample indices `idx`. It is called once, for the degree+1 indices starting
+    each block (indices past count-1 extrapolate the same polynomial). The
+    default block is stable_block(degree); when blocks are no longer than the
+    anchors there is nothing to save and every sample is evaluated exactly.
+    """
+    block = stable_block(degree) if block is None else max(int(block), 1)
+    if count <= 0:
+        return np.empty((0, 2))
+    if block <= degree + 1:
+        return np.asarray(exact(np.arange(count)), dtype=float)
+    starts = np.arange(0, count, block)
+    idx = starts[:, None] + np.arange(degree + 1)
+    anchor = np.asarray(exact(idx.ravel()), dtype=float)
+    anchor = anchor.reshape((len(starts), degree + 1) + anchor.shape[1:])
+    values = difference_blocks(anchor, block)
+    return values.reshape((-1,) + values.shape[2:])[:count]
+
+
+def piecewise_forward_difference(t, spans, exact_span, degree, block=None):
+    """Forward-difference uniform samples `t` of a piecewise polynomial (e.g. a B-spline).
+
+    `spans` gives the polynomial piece of every sample (non-decreasing) and
+    `exact_span(spans, u)` evaluates pieces `spans` exactly at parameters `u`
+    (both arrays). Blocks start at every span change and every `block`
+    samples within a span, so no block crosses a knot.
+    """
+    t = np.asarray(t, dtype=float)
+    spans = np.asarray(spans)
+    count = len(t)
+    if count == 0:
+        return np.empty((0, 2))
+    block = stable_block(degree) if block is None else max(int(block), 1)
+    if block <= degree + 1:
+        return np.asarray(exact_span(spans, t), dtype=float)
+    h = (t[-1] - t[0]) / (count - 1) if count > 1 else 0.0
+    run_starts = np.concatenate([[0], np.flatnonzero(np.diff(spans)) + 1])
+    run_start = run_starts[np.searchsorted(run_starts, np.arange(count), side='right') - 1]
+    starts = np.flatnonzero((np.arange(count) - run_start) % block == 0)
+    lengths = np.diff(np.append(starts, count))
+    u = t[starts][:, None] + h * np.arange(degree + 1)
+    anchor = np.asarray(exact_span(np.repeat(spans[starts], degree + 1), u.ravel()), dtype=float)
+    anchor = anchor.reshape((len(starts), degree + 1) + anchor.shape[1:])
+    values = difference_blocks(anchor, int(lengths.max()))
+    return values[np.arange(values.shape[1]) < lengths[:, None]]
+
+
+def max_error(samples, reference):
+    """Largest Euclidean distance between corresponding rows"""
+    samples = np.asarray(samples, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    if samples.size == 0:
+        return 0.0
+    return float(np.max(np.linalg.norm(samples - reference, axis=1)))
+
+
+def main():
+    import curve_eval
+
+    parser = argparse.ArgumentParser(description="Time forward differencing and report its error.")
+    parser.add_argument('--points', type=int, default=4, help="control points")
+    parser.add_argument('--degree', type=int, default=3, help="B-spline degree")
+    parser.add_argument('--samples', type=int, nargs='*', default=[1000, 100000])
+    parser.add_argument('--block', type=int, help="samples per re-anchoring (default: stable_block(degree))")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    pts = rng.uniform(0, 1000, (args.points, 2))
+    pts3 = np.hstack([pts, np.zeros((args.points, 1))])
+    for s in args.samples:
+        cases = [
+            ('bezier', lambda: curve_eval.bezier_points(pts, s - 1),
+             lambda: curve_eval.bezier_points_forward(pts, s - 1, args.block),
+             lambda: curve_eval.de_casteljau(pts, np.linspace(0.0, 1.0, s))),
+            ('bspline', lambda: curve_eval.bspline(pts3, args.degree, s),
+             lambda: curve_eval.bspline(pts3, args.degree, s, evaluator='forward', block=args.block),
+             lambda: curve_eval.bspline(pts3, args.degree, s)),
+            ('bsplines', lambda: curve_eval.bspline_curve(pts, args.degree, s),
+             lambda: curve_eval.bspline_curve(pts, args.degree, s, evaluator='forward', block=args.block),
+             lambda: curve_eval.bspline_curve(pts, args.degree, s)),
+        ]
+        for name, direct, forward, reference in cases:
+            start = time.perf_counter()
+            direct()
+            direct_time = time.perf_counter() - start
+            start = time.perf_counter()
+            samples = forward()
+            forward_time = time.perf_counter() - start
+            print(f"{name:<9} {s:>8} samples: direct {direct_time * 1000:9.3f} ms, "
+                  f"forward {forward_time * 1000:9.3f} ms, max error {max_error(samples, reference()):.3g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import atexit
+import json
+import os
+import time
+from collections import deque
+
+# Lightweight per-frame instrumentation for the demo render loops.
+#
+# Wrap each part of a frame in `with profiler.phase('name'):` between
+# begin_frame() and end_frame(). While neither the overlay nor a trace is
+# active the profiler is disabled: phase() hands back one shared no-op context
+# manager and the frame calls return immediately.
+#
+# Every profiler recording to the same trace path in a process goes into one
+# file, written once at exit, with its own thread id and name, so importing
+# several demos (headless.py, bench.py) does not lose any of their traces.
+
+TRACE_ENV = 'FRAME_TRACE'  # set to a file path to record a Chrome trace (chrome://tracing)
+MAX_TRACE_EVENTS = 1_000_000
+
+_EPOCH = time.perf_counter()  # shared time base, so merged traces line up
+_tracing = {}  # trace path -> profilers recording to it, in creation order
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class FrameProfiler:
+    """Rolling frame/phase timings with an optional Chrome trace-event recording.
+
+    `show_overlay` is toggled by the demos' profiling key; a trace is recorded
+    when `trace_path` is given (default: the FRAME_TRACE environment variable)
+    and written by write_traces() when the program exits. `name` labels this
+    profiler's track in the trace.
+    """
+
+    def __init__(self, name='frames', history=120, trace_path=None):
+        self.name = name
+        self.show_overlay = False
+        self.trace_path = trace_path if trace_path is not None else os.environ.get(TRACE_ENV)
+        self.frames = deque(maxlen=history)  # (frame seconds, {phase: seconds})
+        self.events = []
+        self._frame_start = None
+        self._phases = {}
+        self._last_title = 0.0
+        self.tid = 0
+        if self.trace_path:
+            if not _tracing:
+                atexit.register(write_traces)
+            profilers = _tracing.setdefault(self.trace_path, [])
+            self.tid = len(profilers)
+            profilers.append(self)
+
+    @property
+    def enabled(self):
+        return self.show_overlay or bool(self.trace_path)
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        return self.show_overlay
+
+    def begin_frame(self):
+        if not self.enabled:
+            self._frame_start = None
+            return
+        self._frame_start = time.perf_counter()
+        self._phases = {}
+
+    def phase(self, name):
+        if self._frame_start is None:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        end = time.perf_counter()
+        self.frames.append((end - self._frame_start, self._phases))
+        self._trace('frame', self._frame_start, end)
+        self._frame_start = None
+
+    def cancel_frame(self):
+        """Drop the current frame, e.g. when input left nothing to redraw"""
+        self._frame_start = None
+
+    def _record(self, name, start, end):
+        self._phases[name] = self._phases.get(name, 0.0) + (end - start)
+        self._trace(name, start, end)
+
+    def _trace(self, name, start, end):
+        if self.trace_path and len(self.events) < MAX_TRACE_EVENTS:
+            self.events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': (start - _EPOCH) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': os.getpid(),
+                'tid': self.tid,
+            })
+
+    # ----------------- Reporting -----------------
+    def summary(self):
+        """Average frame time, FPS and per-phase milliseconds over the rolling window"""
+        if not self.frames:
+            return {'frame_ms': 0.0, 'fps': 0.0, 'phases': {}}
+        count = len(self.frames)
+        frame = sum(f for f, _ in self.frames) / count
+        phases = {}
+        for _, frame_phases in self.frames:
+            for name, seconds in frame_phases.items():
+                phases[name] = phases.get(name, 0.0) + seconds
+        return {
+            'frame_ms': frame * 1000,
+            'fps': 1.0 / frame if frame > 0 else 0.0,
+            'phases': {name: total * 1000 / count for name, total in phases.items()},
+        }
+
+    def overlay_lines(self):
+        """Text lines for an on-screen (or title bar) overlay"""
+        s = self.summary()
+        lines = [f"frame {s['frame_ms']:.2f} ms | {s['fps']:.0f} FPS"]
+        lines += [f"  {name}: {ms:.2f} ms" for name, ms in sorted(s['phases'].items())]
+        return lines
+
+    def overlay_title(self):
+        """The overlay as a single line, for window titles"""
+        s = self.summary()
+        phases = ", ".join(f"{name} {ms:.2f}" for name, ms in sorted(s['phases'].items()))
+        return f"{s['frame_ms']:.2f} ms/frame, {s['fps']:.0f} FPS ({phases} ms)"
+
+    def title_due(self, interval=0.25):
+        """True at most once per `interval` seconds, to rate-limit window title updates"""
+        now = time.perf_counter()
+        if now - self._last_title < interval:
+            return False
+        self._last_title = now
+        return True
+
+    def trace_events(self):
+        """This profiler's events, preceded by the metadata event naming its track"""
+        meta = {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': self.tid, 'args': {'name': self.name}}
+        return [meta] + self.events
+
+    def write_trace(self, path=None):
+        """Write this profiler's events alone to `path` (default: trace_path)"""
+        path = path or self.trace_path
+        if not path:
+            return
+        _dump(path, self.trace_events())
+
+
+def write_traces():
+    """Write one merged trace per path for every profiler that recorded something.
+
+    Registered with atexit by the first tracing profiler; paths no profiler
+    recorded a frame for are left untouched.
+    """
+    for path, profilers in _tracing.items():
+        recorded = [p for p in profilers if p.events]
+        if recorded:
+            _dump(path, [event for p in recorded for event in p.trace_events()])
+
+
+def _dump(path, events):
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
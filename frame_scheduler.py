@@ -0,0 +1,86 @@
+# On-demand redraws for the demo main loops.
+#
+# Input handlers call invalidate() (or request() under GLUT) when they change
+# something visible; the loop draws only while the scheduler is dirty and
+# otherwise blocks until the next input event. Events that arrive while a
+# frame is being drawn are handled together before the next one, so a burst of
+# mouse motion costs one frame, not one per event.
+
+
+class FrameScheduler:
+    """Dirty flag plus counters for a redraw-on-demand loop.
+
+    Starts dirty so the first frame is drawn. `coalesced` counts redraw
+    requests that were merged into an already pending frame.
+    """
+
+    def __init__(self):
+        self.dirty = True
+        self.frames = 0
+        self.coalesced = 0
+
+    def invalidate(self):
+        if self.dirty:
+            self.coalesced += 1
+        self.dirty = True
+
+    def request(self, post):
+        """Mark dirty and call post() (e.g. glutPostRedisplay) once per pending frame"""
+        if self.dirty:
+            self.coalesced += 1
+            return
+        self.dirty = True
+        post()
+
+    def frame_due(self):
+        return self.dirty
+
+    def frame_drawn(self):
+        """Call once the frame has been drawn; later edits dirty it again"""
+        self.dirty = False
+        self.frames += 1
+
+
+def coalesce_motion(events, motion_type):
+    """Drop every motion event that is directly followed by another one.
+
+    Handlers only care where the pointer ended up, so of each run of
+    consecutive motion events only the last is kept; the order relative to
+    button and key events is preserved.
+    """
+    out = []
+    for event in events:
+        if out and event.type == motion_type and out[-1].type == motion_type:
+            out[-1] = event
+        else:
+            out.append(event)
+    return out
+
+
+def pygame_events(scheduler, fps=60, clock=None):
+    """Next batch of pygame events: blocks while the scene is clean, polls while dirty.
+
+    Pass the loop's pygame.time.Clock to cap the loop at `fps`; after an idle
+    wait the tick returns at once, so the first frame of a drag is not delayed.
+    """
+    import pygame
+    events = [] if scheduler.frame_due() else [pygame.event.wait()]
+    if clock is not None:
+        # Sleeps out the rest of the frame during drags, letting motion events pile up
+        clock.tick(fps)
+    events += pygame.event.get()
+    for event in events:
+        if event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE):
+            scheduler.invalidate()
+    return coalesce_motion(events, pygame.MOUSEMOTION)
+
+
+def glfw_wait(scheduler, timeout=None):
+    """Process glfw events, blocking until one arrives when nothing needs drawing"""
+    import glfw
+    if scheduler.frame_due():
+        glfw.poll_events()
+    elif timeout is None:
+        glfw.wait_events()
+    else:
+        glfw.wait_events_timeout(timeout)
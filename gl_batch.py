@@ -0,0 +1,208 @@
+from OpenGL.GL import *
+import numpy as np
+import math
+from clip_engines import next_vertex
+
+# Retained-mode drawing shared by the demos: every batch of polylines, points or
+# line segments lives in its own vertex buffer object and is drawn with a single
+# glDrawArrays call, so the Python -> GL call count no longer grows with the
+# number of vertices.
+
+MARKER_STEPS = 20  # segments per control-point circle
+# Unit circle shared by every marker, computed once
+UNIT_CIRCLE = np.stack([np.cos(2.0 * math.pi * np.arange(MARKER_STEPS) / MARKER_STEPS),
+                        np.sin(2.0 * math.pi * np.arange(MARKER_STEPS) / MARKER_STEPS)], axis=1)
+
+
+def fan_triangles(points, offsets):
+    """(T*3, 2) vertices of a triangle fan per polygon packed as points[offsets[i]:offsets[i+1]].
+
+    Every fan is wound counter-clockwise for a polygon with positive area, so
+    under the nonzero rule each polygon covers its inside once and separate
+    polygons add up instead of cancelling.
+    """
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    counts = np.diff(offsets)
+    nxt = next_vertex(offsets)
+    polygon = np.repeat(np.arange(len(counts)), counts)
+    # Orientation of every polygon (shoelace)
+    area = np.bincount(polygon, weights=pts[:, 0] * pts[nxt, 1] - pts[nxt, 0] * pts[:, 1], minlength=len(counts))
+    first = np.repeat(offsets[:-1], counts)
+    local = np.arange(len(pts)) - first
+    # Vertex j (1 <= j <= count-2) of a polygon spans the triangle (0, j, next)
+    j = np.flatnonzero((local >= 1) & (local <= np.repeat(counts, counts) - 2))
+    if len(j) == 0:
+        return np.zeros((0, 2))
+    a, b, c = pts[first[j]], pts[j], pts[nxt[j]]
+    clockwise = (area < 0)[polygon[j]]
+    b, c = np.where(clockwise[:, None], c, b), np.where(clockwise[:, None], b, c)
+    return np.stack([a, b, c], axis=1).reshape(-1, 2)
+
+
+class VertexBuffer:
+    """Growable GL_ARRAY_BUFFER of float32 vertices.
+
+    upload() skips the transfer when `version` matches the last uploaded version,
+    so callers that track edits can redraw static geometry without re-sending it.
+    """
+
+    def __init__(self, usage=GL_DYNAMIC_DRAW):
+        self.usage = usage
+        self.id = None
+        self.capacity = 0  # bytes allocated on the GPU
+        self.count = 0     # vertices uploaded
+        self.components = 2
+        self.version = None
+
+    def upload(self, vertices, components=None, version=None):
+        if version is not None and version == self.version:
+            return
+        data = np.ascontiguousarray(vertices, dtype=np.float32)
+        if components is None:
+            components = data.shape[-1] if data.ndim > 1 else 2
+        data = data.reshape(-1, components)
+        if self.id is None:
+            self.id = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.id)
+        if data.nbytes > self.capacity:
+            self.capacity = max(data.nbytes, 2 * self.capacity)
+            glBufferData(GL_ARRAY_BUFFER, self.capacity, None, self.usage)
+        if data.nbytes:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.components = components
+        self.count = len(data)
+        self.version = version
+
+    def draw(self, mode, colors=None):
+        """Draw the vertices; `colors` is an optional VertexBuffer of per-vertex RGB(A)"""
+        if self.count == 0:
+            return
+        if colors is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, colors.id)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glColorPointer(colors.components, GL_FLOAT, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, self.id)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(self.components, GL_FLOAT, 0, None)
+        glDrawArrays(mode, 0, self.count)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if colors is not None:
+            glDisableClientState(GL_COLOR_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        if self.id is not None:
+            glDeleteBuffers(1, [self.id])
+            self.id = None
+            self.capacity = self.count = 0
+            self.version = None
+
+
+class BatchRenderer:
+    """Named vertex buffers, one per batch, drawn with one call each.
+
+    `key` names the buffer that holds a batch between frames. Pass a `version`
+    that changes whenever the data changes to skip re-uploading unchanged data;
+    with version=None the data is uploaded on every call.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+
+    def buffer(self, key):
+        if key not in self.buffers:
+            self.buffers[key] = VertexBuffer()
+        return self.buffers[key]
+
+    def _draw(self, key, vertices, mode, color, components=None, version=None):
+        buf = self.buffer(key)
+        buf.upload(vertices, components, version)
+        if len(color) == 4:
+            glColor4f(*color)
+        else:
+            glColor3f(*color)
+        buf.draw(mode)
+
+    def polyline(self, key, vertices, color, width=1.0, version=None):
+        glLineWidth(width)
+        self._draw(key, vertices, GL_LINE_STRIP, color, version=version)
+
+    def line_loop(self, key, vertices, color, width=1.0, version=None):
+        glLineWidth(width)
+        self._draw(key, vertices, GL_LINE_LOOP, color, version=version)
+
+    def lines(self, key, segments, color, width=1.0, version=None):
+        """Draw independent segments given as an (N, 4) array of (x1, y1, x2, y2)"""
+        glLineWidth(width)
+        self._draw(key, segments, GL_LINES, color, components=2, version=version)
+
+    def points(self, key, vertices, color, size=1.0, version=None):
+        glPointSize(size)
+        self._draw(key, vertices, GL_POINTS, color, version=version)
+
+    def polygons(self, key, points, offsets, color, version=None):
+        """Fill polygons packed as points[offsets[i]:offsets[i+1]] with the nonzero rule.
+
+        All polygons go out as one GL_TRIANGLES batch of triangle fans. The fans
+        first count the winding number into the stencil buffer (front faces
+        increment, back faces decrement), then are drawn in color where it is
+        not zero, clearing it again. Concave polygons therefore fill correctly
+        and translucent colors blend once per pixel. Without a stencil buffer
+        every fan is simply filled.
+        """
+        buf = self.buffer(key)
+        if version is None or version != buf.version:
+            buf.upload(fan_triangles(points, offsets), components=2, version=version)
+        if buf.count == 0:
+            return
+        glPushAttrib(GL_ENABLE_BIT | GL_STENCIL_BUFFER_BIT | GL_COLOR_BUFFER_BIT | GL_POLYGON_BIT)
+        glEnable(GL_STENCIL_TEST)
+        glEnable(GL_CULL_FACE)
+        glColorMask(GL_FALSE, GL_FALSE, GL_FALSE, GL_FALSE)
+        glStencilFunc(GL_ALWAYS, 0, 0xFF)
+        glCullFace(GL_BACK)
+        glStencilOp(GL_KEEP, GL_KEEP, GL_INCR_WRAP)
+        buf.draw(GL_TRIANGLES)
+        glCullFace(GL_FRONT)
+        glStencilOp(GL_KEEP, GL_KEEP, GL_DECR_WRAP)
+        buf.draw(GL_TRIANGLES)
+        glDisable(GL_CULL_FACE)
+        glColorMask(GL_TRUE, GL_TRUE, GL_TRUE, GL_TRUE)
+        glStencilFunc(GL_NOTEQUAL, 0, 0xFF)
+        glStencilOp(GL_ZERO, GL_ZERO, GL_ZERO)
+        if len(color) == 4:
+            glColor4f(*color)
+        else:
+            glColor3f(*color)
+        buf.draw(GL_TRIANGLES)
+        glPopAttrib()
+
+    def markers(self, key, centers, radius, colors, outline_color=(0.0, 0.0, 0.0), version=None):
+        """Filled, outlined circles of `radius` at `centers`, with one fill color per marker.
+
+        All fills go out as one GL_TRIANGLES batch with a per-vertex color array
+        and all outlines as one GL_LINES batch, built from the shared unit circle.
+        """
+        fill = self.buffer((key, 'fill'))
+        fill_colors = self.buffer((key, 'fill colors'))
+        outline = self.buffer((key, 'outline'))
+        if version is None or version != fill.version:
+            c = np.asarray(centers, dtype=float).reshape(-1, 2)
+            ring = c[:, None, :] + radius * UNIT_CIRCLE[None, :, :]   # (N, steps, 2)
+            nxt = np.roll(ring, -1, axis=1)
+            center = np.broadcast_to(c[:, None, :], ring.shape)
+            fill.upload(np.stack([center, ring, nxt], axis=2).reshape(-1, 2), version=version)
+            rgb = np.asarray(colors, dtype=float).reshape(-1, 3)
+            fill_colors.upload(np.repeat(rgb, 3 * MARKER_STEPS, axis=0), components=3, version=version)
+            outline.upload(np.stack([ring, nxt], axis=2).reshape(-1, 2), version=version)
+        fill.draw(GL_TRIANGLES, colors=fill_colors)
+        glLineWidth(1.0)
+        glColor3f(*outline_color)
+        outline.draw(GL_LINES)
+
+    def delete(self):
+        for buf in self.buffers.values():
+            buf.delete()
+        self.buffers.clear()
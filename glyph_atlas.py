@@ -0,0 +1,197 @@
+from OpenGL.GL import *
+import ctypes
+import numpy as np
+from gl_batch import VertexBuffer
+
+# Cached text for the demos' instructions and overlays.
+#
+# A font's printable ASCII glyphs are rasterized once with pygame.font into one
+# texture; a string is then a run of textured quads, and every string drawn under
+# one key shares a single vertex buffer that is re-laid out only when the text
+# changes. pygame is imported on first use: where it is not installed (the GLUT
+# demo does not need it) text is drawn with the nearest GLUT bitmap font instead.
+
+ATLAS_WIDTH = 512
+FIRST_CHAR, LAST_CHAR = 32, 126  # printable ASCII; anything else draws as '?'
+BITMAP_FONT_SIZES = {10: 'GLUT_BITMAP_HELVETICA_10', 12: 'GLUT_BITMAP_HELVETICA_12', 18: 'GLUT_BITMAP_HELVETICA_18'}
+
+
+class GlyphAtlas:
+    """One pygame font packed into a white-on-transparent RGBA texture.
+
+    The font and texture are created on first use, so an atlas can be declared
+    at import time before pygame or a GL context is initialized. Coordinates
+    are pixels with y up (glOrtho(0, w, 0, h)).
+    """
+
+    def __init__(self, name=None, size=18):
+        self.name = name
+        self.size = size
+        self.texture = None
+        self.bitmap_font = None  # GLUT font used when pygame is not installed
+        self._surface = None
+
+    @property
+    def ready(self):
+        return self._surface is not None or self.bitmap_font is not None
+
+    def _build(self):
+        try:
+            import pygame
+        except ImportError:
+            from OpenGL import GLUT
+            size = min(BITMAP_FONT_SIZES, key=lambda s: abs(s - self.size))
+            self.bitmap_font = getattr(GLUT, BITMAP_FONT_SIZES[size])
+            return
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.SysFont(self.name, self.size) if self.name else pygame.font.Font(None, self.size)
+        glyphs = [font.render(chr(c), True, (255, 255, 255)) for c in range(FIRST_CHAR, LAST_CHAR + 1)]
+        self.height = font.get_height()
+        self.descent = font.get_descent()  # negative: pixels below the baseline
+        # Shelf-pack the glyphs left to right in rows of the line height
+        rects = []
+        x = y = 0
+        for glyph in glyphs:
+            w = glyph.get_width()
+            if x + w > ATLAS_WIDTH:
+                x, y = 0, y + self.height + 1
+            rects.append((x, y, w))
+            x += w + 1
+        height = y + self.height
+        surface = pygame.Surface((ATLAS_WIDTH, height), pygame.SRCALPHA)
+        surface.fill((255, 255, 255, 0))
+        for glyph, (x, y, w) in zip(glyphs, rects):
+            surface.blit(glyph, (x, y))
+        rects = np.array(rects, dtype=float)
+        self.advance = np.array([font.size(chr(c))[0] for c in range(FIRST_CHAR, LAST_CHAR + 1)], dtype=float)
+        self.widths = rects[:, 2]
+        # Texture rows are flipped on upload, so v = 0 is the bottom of the surface
+        self.uv = np.stack([
+            rects[:, 0] / ATLAS_WIDTH,
+            1.0 - (rects[:, 1] + self.height) / height,
+            (rects[:, 0] + rects[:, 2]) / ATLAS_WIDTH,
+            1.0 - rects[:, 1] / height,
+        ], axis=1)
+        self._surface = surface
+
+    def _upload(self):
+        import pygame
+        if self._surface is None:
+            self._build()
+        data = pygame.image.tostring(self._surface, "RGBA", True)
+        w, h = self._surface.get_size()
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, data)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def text_width(self, text):
+        """Advance of `text` in pixels"""
+        if not self.ready:
+            self._build()
+        if self.bitmap_font is not None:
+            from OpenGL.GLUT import glutBitmapLength
+            return float(glutBitmapLength(self.bitmap_font, text.encode('ascii', 'replace')))
+        codes = np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8).astype(np.int64)
+        idx = np.where((codes >= FIRST_CHAR) & (codes <= LAST_CHAR), codes, ord('?')) - FIRST_CHAR
+        return float(self.advance[idx].sum())
+
+    def layout(self, lines):
+        """(4 * glyphs, 4) float32 quad vertices (x, y, u, v) for [(x, baseline y, text), ...]"""
+        if self._surface is None:
+            self._build()
+        quads = []
+        for x, y, text in lines:
+            codes = np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8).astype(np.int64)
+            idx = np.where((codes >= FIRST_CHAR) & (codes <= LAST_CHAR), codes, ord('?')) - FIRST_CHAR
+            if len(idx) == 0:
+                continue
+            x0 = x + np.concatenate([[0.0], np.cumsum(self.advance[idx])[:-1]])
+            x1 = x0 + self.widths[idx]
+            y0 = np.full(len(idx), y + self.descent, dtype=float)
+            y1 = y0 + self.height
+            u0, v0, u1, v1 = self.uv[idx].T
+            quads.append(np.stack([
+                np.stack([x0, y0, u0, v0], axis=1),
+                np.stack([x1, y0, u1, v0], axis=1),
+                np.stack([x1, y1, u1, v1], axis=1),
+                np.stack([x0, y1, u0, v1], axis=1),
+            ], axis=1).reshape(-1, 4))
+        if not quads:
+            return np.zeros((0, 4), dtype=np.float32)
+        return np.concatenate(quads).astype(np.float32)
+
+
+class TextRenderer:
+    """Strings drawn from a GlyphAtlas, one vertex buffer and one draw call per key.
+
+    draw() lays the text out again only when the lines under `key` change, so
+    unchanged instructions cost a tuple comparison and a handful of GL calls.
+    """
+
+    def __init__(self, atlas):
+        self.atlas = atlas
+        self.buffers = {}
+
+    def draw(self, key, lines, color=(1.0, 1.0, 1.0)):
+        """Draw [(x, baseline y, text), ...] in `color` (RGB or RGBA)"""
+        lines = tuple(lines)
+        if not self.atlas.ready:
+            self.atlas._build()
+        if self.atlas.bitmap_font is not None:
+            self._draw_bitmap(lines, color)
+            return
+        buf = self.buffers.get(key)
+        if buf is None:
+            buf = self.buffers[key] = VertexBuffer()
+        if buf.version != lines:
+            buf.upload(self.atlas.layout(lines), components=4, version=lines)
+        if buf.count == 0:
+            return
+        if self.atlas.texture is None:
+            self.atlas._upload()
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_TEXTURE_BIT)
+        glEnable(GL_TEXTURE_2D)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+        glBindTexture(GL_TEXTURE_2D, self.atlas.texture)
+        if len(color) == 4:
+            glColor4f(*color)
+        else:
+            glColor3f(*color)
+        stride = 4 * 4
+        glBindBuffer(GL_ARRAY_BUFFER, buf.id)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(2, GL_FLOAT, stride, None)
+        glTexCoordPointer(2, GL_FLOAT, stride, ctypes.c_void_p(8))
+        glDrawArrays(GL_QUADS, 0, buf.count)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glPopAttrib()
+
+    def _draw_bitmap(self, lines, color):
+        """Fallback without pygame: one glutBitmapCharacter call per character"""
+        from OpenGL.GLUT import glutBitmapCharacter
+        if len(color) == 4:
+            glColor4f(*color)
+        else:
+            glColor3f(*color)
+        for x, y, text in lines:
+            glRasterPos2f(x, y)
+            for ch in text.encode('ascii', 'replace'):
+                glutBitmapCharacter(self.atlas.bitmap_font, ch)
+
+    def delete(self):
+        for buf in self.buffers.values():
+            buf.delete()
+        self.buffers.clear()
+        if self.atlas.texture is not None:
+            glDeleteTextures([self.atlas.texture])
+            self.atlas.texture = None
@@ -0,0 +1,292 @@
+import argparse
+import time
+import numpy as np
+from clip_engines import next_vertex
+
+# Headless CPU backend: draws the demos' primitives (polylines, point markers,
+# line segments and filled polygons) into a NumPy RGB framebuffer with the same calls as
+# gl_batch.BatchRenderer, so whole frames can be timed and compared as images on
+# machines without a display or GPU.
+
+
+class HeadlessRenderer:
+    """Rasterizes BatchRenderer calls into `framebuffer`, a (height, width, 3) uint8 array.
+
+    World coordinates are mapped to pixels with an orthographic projection given
+    like glOrtho's (left, right, bottom, top). Keys and versions are accepted for
+    interface compatibility but there is nothing to retain between frames.
+    """
+
+    def __init__(self, width, height, ortho=None):
+        self.width = width
+        self.height = height
+        self.ortho = ortho if ortho is not None else (0, width, 0, height)
+        self.framebuffer = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def clear(self, color=(0.0, 0.0, 0.0)):
+        self.framebuffer[:] = np.round(np.asarray(color[:3]) * 255).astype(np.uint8)
+
+    # ----------------- BatchRenderer interface -----------------
+    def polyline(self, key, vertices, color, width=1.0, version=None):
+        v = self._vertices(vertices)
+        if len(v) >= 2:
+            self._segments(np.hstack([v[:-1], v[1:]]), color, width)
+
+    def line_loop(self, key, vertices, color, width=1.0, version=None):
+        v = self._vertices(vertices)
+        if len(v) >= 2:
+            self._segments(np.hstack([v, np.roll(v, -1, axis=0)]), color, width)
+
+    def lines(self, key, segments, color, width=1.0, version=None):
+        seg = np.asarray(segments, dtype=float).reshape(-1, 4)
+        if len(seg):
+            self._segments(seg, color, width)
+
+    def points(self, key, vertices, color, size=1.0, version=None):
+        v = self._vertices(vertices)
+        if len(v):
+            px, py = self._to_pixels(v)
+            self._plot(np.floor(px), np.floor(py), color, self._square(size))
+
+    def polygons(self, key, points, offsets, color, version=None):
+        """Scanline fill of polygons packed as points[offsets[i]:offsets[i+1]] with the nonzero rule.
+
+        Every polygon is counted as counter-clockwise, so separate polygons add
+        up where they overlap, as in the GL path.
+        """
+        v = self._vertices(points)
+        offsets = np.asarray(offsets, dtype=np.intp)
+        counts = np.diff(offsets)
+        if len(v) == 0:
+            return
+        nxt = next_vertex(offsets)
+        polygon = np.repeat(np.arange(len(counts)), counts)
+        x0, y0 = self._to_pixels(v)
+        x1, y1 = x0[nxt], y0[nxt]
+        # Orientation of every polygon (shoelace), so each one winds +1 around its inside
+        area = np.bincount(polygon, weights=x0 * y1 - x1 * y0, minlength=len(counts))
+        direction = np.sign(y1 - y0) * np.where(area[polygon] < 0, -1.0, 1.0)
+        # Rows whose pixel centres lie in [min y, max y) of each edge; horizontal edges cover none
+        lo = np.clip(np.ceil(np.minimum(y0, y1) - 0.5), 0, self.height).astype(np.int64)
+        hi = np.clip(np.ceil(np.maximum(y0, y1) - 0.5), 0, self.height).astype(np.int64)
+        rows = np.maximum(hi - lo, 0)
+        edge = np.repeat(np.arange(len(v)), rows)
+        if len(edge) == 0:
+            return
+        row = lo[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(rows) - rows, rows)
+        x = x0[edge] + (row + 0.5 - y0[edge]) * (x1 - x0)[edge] / (y1 - y0)[edge]
+        # Winding number to the right of every crossing; it returns to 0 at the end of each row
+        order = np.lexsort((x, row))
+        x, row = x[order], row[order]
+        winding = np.cumsum(direction[edge][order])
+        fill = np.flatnonzero(winding[:-1] != 0)
+        c0 = np.clip(np.ceil(x[fill] - 0.5), 0, self.width).astype(np.int64)
+        c1 = np.clip(np.ceil(x[fill + 1] - 0.5), 0, self.width).astype(np.int64)
+        length = np.maximum(c1 - c0, 0)
+        span = np.repeat(np.arange(len(length)), length)
+        cols = c0[span] + np.arange(len(span)) - np.repeat(np.cumsum(length) - length, length)
+        self._plot(cols, row[fill][span], color, (np.zeros(1), np.zeros(1)))
+
+    def markers(self, key, centers, radius, colors, outline_color=(0.0, 0.0, 0.0), version=None):
+        v = self._vertices(centers)
+        if len(v) == 0:
+            return
+        # Radius in pixels along x, as the GL path draws circles in world units
+        l, r, b, t = self.ortho
+        rad = radius * self.width / abs(r - l)
+        dx, dy = np.meshgrid(np.arange(-np.ceil(rad), np.ceil(rad) + 1), np.arange(-np.ceil(rad), np.ceil(rad) + 1))
+        dist = np.hypot(dx, dy)
+        fill = (dx[dist <= rad], dy[dist <= rad])
+        ring = (dx[np.abs(dist - rad) <= 0.5], dy[np.abs(dist - rad) <= 0.5])
+        px, py = self._to_pixels(v)
+        cols, rows = np.floor(px), np.floor(py)
+        colors = np.asarray(colors, dtype=float).reshape(-1, 3)
+        self._plot(cols, rows, colors, fill)
+        self._plot(cols, rows, outline_color, ring)
+
+    # ----------------- Rasterization -----------------
+    @staticmethod
+    def _vertices(vertices):
+        v = np.asarray(vertices, dtype=float)
+        if v.size == 0:
+            return np.zeros((0, 2))
+        return v.reshape(len(v), -1)[:, :2]
+
+    def _to_pixels(self, xy):
+        """World (x, y) -> continuous pixel (column, row) with row 0 at the top"""
+        l, r, b, t = self.ortho
+        px = (xy[:, 0] - l) * (self.width / (r - l))
+        py = (t - xy[:, 1]) * (self.height / (t - b))
+        return px, py
+
+    @staticmethod
+    def _square(size):
+        s = max(1, int(round(size)))
+        d = np.arange(s) - (s - 1) // 2
+        dx, dy = np.meshgrid(d, d)
+        return dx.ravel(), dy.ravel()
+
+    def _segments(self, seg, color, width):
+        """DDA-rasterize (N, 4) world-space segments with a square pen of `width` pixels"""
+        x0, y0 = self._to_pixels(seg[:, :2])
+        x1, y1 = self._to_pixels(seg[:, 2:])
+        # Clip to the framebuffer (Liang-Barsky) so huge segments cost no more than the screen
+        pad = width + 1
+        dx, dy = x1 - x0, y1 - y0
+        p = np.stack([-dx, dx, -dy, dy], axis=1)
+        q = np.stack([x0 + pad, self.width + pad - x0, y0 + pad, self.height + pad - y0], axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = q / p
+        u0 = np.max(np.where(p < 0, r, 0.0), axis=1)
+        u1 = np.min(np.where(p > 0, r, 1.0), axis=1)
+        keep = ~np.any((p == 0) & (q < 0), axis=1) & (u0 <= u1)
+        x0, y0, dx, dy, u0, u1 = x0[keep], y0[keep], dx[keep], dy[keep], u0[keep], u1[keep]
+        ax, ay = x0 + u0 * dx, y0 + u0 * dy
+        bx, by = x0 + u1 * dx, y0 + u1 * dy
+        # One sample per pixel step along the major axis
+        steps = np.ceil(np.maximum(np.abs(bx - ax), np.abs(by - ay))).astype(np.int64) + 1
+        total = int(steps.sum())
+        if total == 0:
+            return
+        seg_id = np.repeat(np.arange(len(steps)), steps)
+        k = np.arange(total) - np.repeat(np.cumsum(steps) - steps, steps)
+        t = k / np.maximum(steps - 1, 1)[seg_id]
+        xs = ax[seg_id] + t * (bx - ax)[seg_id]
+        ys = ay[seg_id] + t * (by - ay)[seg_id]
+        self._plot(np.floor(xs), np.floor(ys), color, self._square(width))
+
+    def _plot(self, cols, rows, color, stamp):
+        """Stamp the pixel offsets `stamp` at every (col, row), blending RGBA colors.
+
+        `color` is one RGB(A) tuple or an (N, 3) array with one color per position.
+        """
+        sx, sy = stamp
+        c = (cols[:, None] + sx[None, :]).astype(np.int64).ravel()
+        r = (rows[:, None] + sy[None, :]).astype(np.int64).ravel()
+        inside = (c >= 0) & (c < self.width) & (r >= 0) & (r < self.height)
+        flat = r[inside] * self.width + c[inside]
+        pixels = self.framebuffer.reshape(-1, 3)
+        color = np.asarray(color, dtype=float)
+        if color.ndim == 2:
+            rgb = np.repeat(color, len(sx), axis=0)[inside]
+            pixels[flat] = np.round(rgb * 255).astype(np.uint8)
+            return
+        rgb = color[:3] * 255
+        if len(color) == 4 and color[3] < 1.0:
+            # Blend every covered pixel once, however many stamps overlap it
+            covered = np.zeros(len(pixels), dtype=bool)
+            covered[flat] = True
+            flat = np.flatnonzero(covered)
+            a = color[3]
+            pixels[flat] = np.round(pixels[flat] * (1.0 - a) + rgb * a).astype(np.uint8)
+        else:
+            pixels[flat] = np.round(rgb).astype(np.uint8)
+
+
+def write_ppm(path, framebuffer):
+    """Write an RGB framebuffer as a binary PPM image"""
+    h, w, _ = framebuffer.shape
+    with open(path, 'wb') as f:
+        f.write(b"P6\n%d %d\n255\n" % (w, h))
+        f.write(np.ascontiguousarray(framebuffer).tobytes())
+
+
+def read_ppm(path):
+    with open(path, 'rb') as f:
+        header = []
+        while len(header) < 4:
+            header += f.readline().split()
+        w, h = int(header[1]), int(header[2])
+        return np.frombuffer(f.read(w * h * 3), dtype=np.uint8).reshape(h, w, 3)
+
+
+def image_diff(a, b):
+    """Fraction of pixels that differ between two framebuffers"""
+    if a.shape != b.shape:
+        return 1.0
+    return float(np.mean(np.any(a != b, axis=2)))
+
+
+# ----------------- Demo scenes -----------------
+def bezier_scene(count, rng):
+    import bezier_curve
+    w, h = bezier_curve.WIN_W, bezier_curve.WIN_H
+    bezier_curve.control_points.clear()
+    bezier_curve.control_points.extend(map(tuple, rng.uniform((0, 0), (w, h), (count, 2))))
+    target = HeadlessRenderer(w, h)
+    return target, (0.08, 0.08, 0.1), bezier_curve.draw_scene
+
+
+def bspline_scene(count, rng):
+    import bspline
+    from bspline_spans import IncrementalBSpline
+    w, h = 900, 700
+    curve = IncrementalBSpline(3, clamped=True, dim=3)
+    curve.reset(np.hstack([rng.uniform((0, 0), (w, h), (count, 2)), np.zeros((count, 1))]))
+    target = HeadlessRenderer(w, h)
+    return target, (0.0, 0.0, 0.0), lambda t: bspline.draw_scene(t, curve)
+
+
+def bsplines_scene(count, rng):
+    import bsplines
+    bsplines.control_points[:] = [tuple(p) for p in rng.uniform(-1, 1, (count, 2))]
+    bsplines.curve.reset(bsplines.control_points)
+    target = HeadlessRenderer(800, 600, ortho=(-1, 1, -1, 1))
+    return target, (0.0, 0.0, 0.0), bsplines.draw_scene
+
+
+def csw_scene(count, rng):
+    import csw
+    clipper = csw.LineClipping()
+    for line in rng.uniform(-1, 1, (count, 4)):
+        clipper.add_line(tuple(line))
+    target = HeadlessRenderer(1000, 700, ortho=(-1, 1, -1, 1))
+    return target, (1.0, 1.0, 1.0), clipper.draw_scene
+
+
+SCENES = {
+    'bezier': bezier_scene,
+    'bspline': bspline_scene,
+    'bsplines': bsplines_scene,
+    'csw': csw_scene,
+}
+
+
+def render_frames(scene, count=20, frames=10, seed=0):
+    """Build a demo scene with `count` random points/lines and render it `frames` times.
+
+    Returns (framebuffer, seconds per frame).
+    """
+    target, background, draw = SCENES[scene](count, np.random.default_rng(seed))
+    start = time.perf_counter()
+    for _ in range(frames):
+        target.clear(background)
+        draw(target)
+    elapsed = (time.perf_counter() - start) / max(frames, 1)
+    return target.framebuffer, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a demo scene without a display and time it.")
+    parser.add_argument('scene', choices=sorted(SCENES))
+    parser.add_argument('--count', type=int, default=20, help="control points (or lines for csw)")
+    parser.add_argument('--frames', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="write the last frame as a PPM image")
+    parser.add_argument('--reference', help="PPM image to compare the last frame against")
+    args = parser.parse_args()
+
+    framebuffer, seconds = render_frames(args.scene, args.count, args.frames, args.seed)
+    print(f"{args.scene}: {seconds * 1000:.3f} ms/frame ({1.0 / seconds:.1f} FPS) over {args.frames} frames")
+    if args.out:
+        write_ppm(args.out, framebuffer)
+        print(f"Wrote {args.out}")
+    if args.reference:
+        diff = image_diff(framebuffer, read_ppm(args.reference))
+        print(f"Pixels differing from {args.reference}: {diff * 100:.3f}%")
+        if diff > 0:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import math
+import numpy as np
+
+# Uniform-grid picking for the interactive demos.
+#
+# PointGrid answers "which control point is under the cursor" by scanning only
+# the cells around the cursor, and is updated in place by the edit handlers.
+# SegmentGrid answers "where is the nearest point on the curve" against a
+# tessellated polyline; it is rebuilt whenever the tessellation changes.
+
+PICK_CELL_SIZE = 32.0  # pixels
+
+
+class PointGrid:
+    """Control point indices bucketed by grid cell.
+
+    `version` records the ControlPointList version the grid was last synced
+    with, so callers can tell when an edit bypassed the incremental updates.
+    """
+
+    def __init__(self, cell_size=PICK_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}   # (cx, cy) -> [point index, ...]
+        self.points = []  # (x, y) of every indexed point
+        self.version = None
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def rebuild(self, points, version=None):
+        self.cells = {}
+        self.points = []
+        for p in points:
+            self.add(p)
+        self.version = version
+
+    def add(self, p, version=None):
+        x, y = p[0], p[1]
+        self.cells.setdefault(self._cell(x, y), []).append(len(self.points))
+        self.points.append((x, y))
+        self.version = version
+
+    def move(self, i, p, version=None):
+        old = self._cell(*self.points[i])
+        x, y = p[0], p[1]
+        new = self._cell(x, y)
+        if new != old:
+            bucket = self.cells[old]
+            bucket.remove(i)
+            if not bucket:
+                del self.cells[old]
+            self.cells.setdefault(new, []).append(i)
+        self.points[i] = (x, y)
+        self.version = version
+
+    def nearest(self, x, y, max_dist):
+        """Index of the closest point strictly within `max_dist` (lowest index on ties), or None"""
+        cx, cy = self._cell(x, y)
+        r = math.ceil(max_dist / self.cell_size)
+        best = None
+        best_key = (max_dist * max_dist, -1)
+        for gx in range(cx - r, cx + r + 1):
+            for gy in range(cy - r, cy + r + 1):
+                for i in self.cells.get((gx, gy), ()):
+                    px, py = self.points[i]
+                    key = ((px - x) ** 2 + (py - y) ** 2, i)
+                    if key[0] < max_dist * max_dist and key < best_key:
+                        best, best_key = i, key
+        return best
+
+
+class SegmentGrid:
+    """Static grid over the segments of a polyline for nearest-point queries.
+
+    Every segment is listed under each cell its bounding box overlaps; the
+    (cell key, segment) pairs are kept sorted by key so a query gathers the
+    candidate segments of the cells around it with searchsorted.
+    """
+
+    def __init__(self, vertices, cell_size=PICK_CELL_SIZE):
+        self.cell_size = cell_size
+        v = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        self.a = v[:-1]
+        self.d = v[1:] - v[:-1]
+        if len(self.a) == 0:
+            self._keys = np.zeros(0, dtype=np.int64)
+            self._segments = np.zeros(0, dtype=np.intp)
+            return
+        lo = np.floor(np.minimum(v[:-1], v[1:]) / cell_size).astype(np.int64)
+        hi = np.floor(np.maximum(v[:-1], v[1:]) / cell_size).astype(np.int64)
+        self._origin = lo.min(axis=0)
+        self._shape = hi.max(axis=0) - self._origin + 1
+        # Enumerate the cells of every segment's box without a Python loop
+        span = hi - lo + 1
+        counts = span[:, 0] * span[:, 1]
+        seg = np.repeat(np.arange(len(counts)), counts)
+        k = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = lo[seg, 0] + k // span[seg, 1]
+        cy = lo[seg, 1] + k % span[seg, 1]
+        keys = self._key(cx, cy)
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._segments = seg[order]
+
+    def _key(self, cx, cy):
+        return (cx - self._origin[0]) * self._shape[1] + (cy - self._origin[1])
+
+    def candidates(self, x, y, max_dist):
+        """Indices of the segments listed in the cells within `max_dist` of (x, y)"""
+        if len(self._keys) == 0:
+            return self._segments
+        lo = np.floor((np.array([x, y]) - max_dist) / self.cell_size).astype(np.int64)
+        hi = np.floor((np.array([x, y]) + max_dist) / self.cell_size).astype(np.int64)
+        lo = np.maximum(lo, self._origin)
+        hi = np.minimum(hi, self._origin + self._shape - 1)
+        if np.any(lo > hi):
+            return self._segments[:0]
+        cx, cy = np.meshgrid(np.arange(lo[0], hi[0] + 1), np.arange(lo[1], hi[1] + 1), indexing='ij')
+        keys = self._key(cx.ravel(), cy.ravel())
+        starts = np.searchsorted(self._keys, keys, 'left')
+        ends = np.searchsorted(self._keys, keys, 'right')
+        return np.unique(np.concatenate([self._segments[s:e] for s, e in zip(starts, ends)]))
+
+    def nearest(self, x, y, max_dist):
+        """Closest point on the polyline within `max_dist` of (x, y).
+
+        Returns (segment index, position 0..1 along it, distance, (px, py)) or None.
+        """
+        idx = self.candidates(x, y, max_dist)
+        if len(idx) == 0:
+            return None
+        a, d = self.a[idx], self.d[idx]
+        rel = np.array([x, y]) - a
+        length_sq = np.einsum('ij,ij->i', d, d)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = np.where(length_sq > 0.0, np.einsum('ij,ij->i', rel, d) / length_sq, 0.0)
+        s = np.clip(s, 0.0, 1.0)
+        p = a + s[:, None] * d
+        dist_sq = np.einsum('ij,ij->i', p - (x, y), p - (x, y))
+        best = int(np.argmin(dist_sq))
+        if dist_sq[best] > max_dist * max_dist:
+            return None
+        return int(idx[best]), float(s[best]), math.sqrt(float(dist_sq[best])), tuple(p[best])
@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from curve_eval import bezier_points, bspline, bspline_curve
+
+# Offline batch tessellation of many control polygons.
+#
+# Polygons are read from .npy, .npz or JSON-lines files, converted once into a
+# flat points .npy plus an offsets .npy, split into chunks and tessellated by a
+# process pool. Workers memory-map the converted input and write their rows
+# straight into one memory-mapped .npy output of shape (curves, samples, 2), so
+# neither input nor results are copied per worker; curves with too few points
+# for their degree are NaN.
+#
+# Input layouts:
+#   .npy   (curves, points, 2) array, all polygons the same length (memory-mapped)
+#   .npz   'points' (total, 2) plus 'offsets' (curves+1,), or one (curves, points, 2) array
+#   .jsonl one polygon per line: [[x, y], ...] or {"points": [[x, y], ...]}
+
+CURVES = ('bezier', 'bspline', 'bsplines')
+COPY_CURVES = 1 << 14  # curves copied per step when converting a .npy with extra columns
+
+
+def load_polygons(path, mmap=True):
+    """Return (points (total, 2), offsets (curves+1,)); polygon i is points[offsets[i]:offsets[i+1]]"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        arr = np.load(path, mmap_mode='r' if mmap else None)
+        return _fixed(arr)
+    if ext == '.npz':
+        with np.load(path) as data:
+            if 'points' in data and 'offsets' in data:
+                return np.asarray(data['points'], dtype=float).reshape(-1, 2), np.asarray(data['offsets'])
+            return _fixed(data[data.files[0]])
+    if ext in ('.jsonl', '.json'):
+        polygons = []
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    polygons.append(record['points'] if isinstance(record, dict) else record)
+        lengths = [len(p) for p in polygons]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        points = np.array([xy[:2] for p in polygons for xy in p], dtype=float).reshape(-1, 2)
+        return points, offsets
+    raise ValueError(f"unsupported input format: {path}")
+
+
+def _fixed(arr):
+    if arr.ndim != 3 or arr.shape[2] < 2:
+        raise ValueError(f"expected a (curves, points, 2) array, got shape {arr.shape}")
+    curves, count = arr.shape[:2]
+    points = arr[:, :, :2].reshape(-1, 2) if arr.shape[2] > 2 else arr.reshape(-1, 2)
+    return points, np.arange(curves + 1, dtype=np.int64) * count
+
+
+def convert_polygons(path, workdir):
+    """Store the polygons of `path` as points (total, 2) and offsets .npy files in workdir.
+
+    Returns (points path, offsets path). A C-ordered (curves, points, 2) .npy is
+    used in place; wider .npy input is copied a block of curves at a time, and
+    .npz/.jsonl input is parsed once here.
+    """
+    points_path = os.path.join(workdir, 'points.npy')
+    offsets_path = os.path.join(workdir, 'offsets.npy')
+    if os.path.splitext(path)[1].lower() == '.npy':
+        arr = np.load(path, mmap_mode='r')
+        if arr.ndim != 3 or arr.shape[2] < 2:
+            raise ValueError(f"expected a (curves, points, 2) array, got shape {arr.shape}")
+        curves, count = arr.shape[:2]
+        offsets = np.arange(curves + 1, dtype=np.int64) * count
+        if arr.shape[2] == 2 and arr.flags.c_contiguous:
+            points_path = path
+        else:
+            out = np.lib.format.open_memmap(points_path, mode='w+', dtype=arr.dtype, shape=(curves * count, 2))
+            for start in range(0, curves, COPY_CURVES):
+                stop = min(start + COPY_CURVES, curves)
+                out[start * count:stop * count] = arr[start:stop, :, :2].reshape(-1, 2)
+            out.flush()
+            del out
+    else:
+        points, offsets = load_polygons(path)
+        np.save(points_path, points)
+    np.save(offsets_path, np.asarray(offsets, dtype=np.int64))
+    return points_path, offsets_path
+
+
+def tessellate(points, curve='bezier', samples=100, degree=3):
+    """(samples, 2) polyline of one control polygon, NaN if it has too few points"""
+    pts = np.asarray(points, dtype=float)
+    if curve == 'bezier':
+        # Same values as bezier_point at t = i/(samples-1), evaluated as one product
+        out = bezier_points(pts, samples - 1) if len(pts) else np.empty((0, 2))
+    elif curve == 'bspline':
+        out = bspline(pts, degree, samples)
+    else:
+        out = bspline_curve(pts, degree, samples) if len(pts) > degree else np.empty((0, 2))
+    if len(out) != samples:
+        return np.full((samples, 2), np.nan)
+    return out
+
+
+# ----------------- Worker processes -----------------
+_worker = {}
+
+
+def _init_worker(points_path, offsets_path, output_path, curve, samples, degree):
+    points = np.load(points_path, mmap_mode='r')
+    _worker['polygons'] = points.reshape(-1, 2), np.load(offsets_path, mmap_mode='r')
+    _worker['output'] = np.load(output_path, mmap_mode='r+')
+    _worker['options'] = (curve, samples, degree)
+
+
+def _run_chunk(start, stop):
+    points, offsets = _worker['polygons']
+    output = _worker['output']
+    curve, samples, degree = _worker['options']
+    for i in range(start, stop):
+        output[i] = tessellate(points[offsets[i]:offsets[i + 1]], curve, samples, degree)
+    output.flush()
+    return stop - start
+
+
+def run(input_path, output_path, curve='bezier', samples=100, degree=3, workers=None, chunk=None,
+        dtype=np.float32):
+    """Tessellate every polygon of input_path into output_path; returns (curves, seconds)"""
+    workdir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.TemporaryDirectory(prefix='tessellate-', dir=workdir) as tmp:
+        points_path, offsets_path = convert_polygons(input_path, tmp)
+        curves = len(np.load(offsets_path, mmap_mode='r')) - 1
+        output = np.lib.format.open_memmap(output_path, mode='w+', dtype=dtype, shape=(curves, samples, 2))
+        del output  # workers reopen it; the header is already on disk
+        workers = workers or os.cpu_count() or 1
+        chunk = chunk or max(1, -(-curves // (workers * 8)))
+        start = time.perf_counter()
+        args = (points_path, offsets_path, output_path, curve, samples, degree)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=args) as pool:
+            starts = range(0, curves, chunk)
+            stops = [min(s + chunk, curves) for s in starts]
+            done = sum(pool.map(_run_chunk, starts, stops))
+        return done, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tessellate many control polygons in parallel.")
+    parser.add_argument('input', help=".npy, .npz or .jsonl control polygons")
+    parser.add_argument('output', help=".npy file for the (curves, samples, 2) polylines")
+    parser.add_argument('--curve', choices=CURVES, default='bezier')
+    parser.add_argument('--samples', type=int, default=100, help="points per polyline")
+    parser.add_argument('--degree', type=int, default=3, help="B-spline degree")
+    parser.add_argument('--workers', type=int, help="processes (default: CPU count)")
+    parser.add_argument('--chunk', type=int, help="curves per task")
+    parser.add_argument('--dtype', choices=('float32', 'float64'), default='float32')
+    args = parser.parse_args()
+
+    curves, seconds = run(args.input, args.output, args.curve, args.samples, args.degree,
+                          args.workers, args.chunk, np.dtype(args.dtype))
+    rate = curves / seconds if seconds > 0 else float('inf')
+    print(f"{curves} {args.curve} curves -> {args.output} in {seconds:.3f} s: "
+          f"{rate:.1f} curves/s, {rate * args.samples:.4g} samples/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import curve_eval
+from bspline_spans import IncrementalBSpline, bezier_segments, conversion_matrix, insert_knot
+
+
+def reference(curve):
+    """The demos' one-shot evaluation at the same parameters as curve.points()"""
+    pts = curve.control_points
+    count = curve.num_spans * curve.samples_per_span + 1
+    if curve.clamped:
+        return curve_eval.bspline(pts, curve.degree, count)
+    return curve_eval.bspline_curve(pts, curve.degree, count)
+
+
+@pytest.mark.parametrize('clamped', [True, False])
+@pytest.mark.parametrize('degree', [1, 2, 3, 5])
+def test_incremental_edits_match_full_evaluation(clamped, degree):
+    rng = np.random.default_rng(degree)
+    curve = IncrementalBSpline(degree, clamped=clamped)
+    for p in rng.uniform(-1, 1, (12, 2)):
+        curve.append(p)
+        if len(curve) > degree:
+            np.testing.assert_allclose(curve.points(), reference(curve), atol=1e-12)
+    for j in rng.integers(0, 12, 20):
+        curve.move(j, rng.uniform(-1, 1, 2))
+        np.testing.assert_allclose(curve.points(), reference(curve), atol=1e-12)
+    curve.set_degree(max(1, degree - 1))
+    np.testing.assert_allclose(curve.points(), reference(curve), atol=1e-12)
+
+
+def test_knot_insertion_keeps_the_curve():
+    rng = np.random.default_rng(4)
+    ctrl = rng.uniform(-1, 1, (7, 2))
+    knots = np.array([0, 0, 0, 0, 1, 2, 3, 4, 4, 4, 4], dtype=float) / 4
+    t = np.linspace(0, 1, 101)
+    new_knots, new_ctrl = insert_knot(knots, ctrl, 3, 0.3, times=2)
+    assert len(new_ctrl) == len(ctrl) + 2
+    np.testing.assert_allclose(curve_eval.de_boor_batch(3, t, new_knots, new_ctrl),
+                               curve_eval.de_boor_batch(3, t, knots, ctrl), atol=1e-12)
+    # Four Bezier pieces, one per span, joined end to end
+    pieces = bezier_segments(knots, ctrl, 3)
+    assert pieces.shape == (4, 4, 2)
+    np.testing.assert_allclose(pieces[1:, 0], pieces[:-1, -1], atol=1e-12)
+    np.testing.assert_allclose(conversion_matrix(3, tuple(np.arange(-3.0, 5.0))).sum(axis=1), 1.0)
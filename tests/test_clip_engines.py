@@ -0,0 +1,170 @@
+import numpy as np
+import pytest
+
+from clip_engines import (LEFT, RIGHT, BOTTOM, TOP, CohenSutherlandEngine, CyrusBeckEngine,
+                          LiangBarskyEngine, PolygonBatch, SutherlandHodgmanEngine, next_vertex,
+                          polygon_edges)
+
+WINDOW = {'xmin': -0.5, 'ymin': -0.5, 'xmax': 0.5, 'ymax': 0.5}
+
+
+def random_segments(seed, count=2000):
+    """Random (N, 4) segments plus endpoints exactly on window edges and corners"""
+    rng = np.random.default_rng(seed)
+    grid = np.array([-1.0, -0.5, 0.0, 0.5, 1.0])  # -0.5 and 0.5 are the window edges
+    segments = [rng.uniform(-1.5, 1.5, (count, 4)),
+                rng.choice(grid, (count, 4)),
+                np.column_stack([rng.uniform(-1.5, 1.5, (count, 2)), rng.choice(grid, (count, 2))]),
+                # Segments lying on the window border and single points
+                [(-0.5, -1.0, -0.5, 1.0), (-1.0, 0.5, 1.0, 0.5), (0.5, 0.5, 0.5, 0.5), (-0.5, -0.5, -0.5, -0.5),
+                 (0.75, 0.75, 0.75, 0.75), (-0.5, 0.5, 0.5, -0.5), (-1.0, 0.0, -0.5, 0.0)]]
+    return np.vstack(segments)
+
+
+def assert_batch_matches_clip(engine, segments):
+    clipped, visible = engine.clip_batch(WINDOW, segments)
+    for i, line in enumerate(segments.tolist()):
+        *expected, expected_visible = engine.clip(WINDOW, *line)
+        assert visible[i] == expected_visible, line
+        if expected_visible:
+            np.testing.assert_allclose(clipped[i], expected, atol=1e-12, err_msg=str(line))
+
+
+def test_cohen_sutherland_batch_matches_scalar():
+    segments = random_segments(11)
+    assert_batch_matches_clip(CohenSutherlandEngine(), segments)
+    # The batch path does the same work per line, so the counters agree too
+    scalar, batch = CohenSutherlandEngine(), CohenSutherlandEngine()
+    for line in segments.tolist():
+        scalar.clip(WINDOW, *line)
+    batch.clip_batch(WINDOW, segments)
+    assert batch.counters == scalar.counters
+
+
+@pytest.mark.parametrize('engine', [LiangBarskyEngine, CyrusBeckEngine,
+                                    lambda: CyrusBeckEngine([(-0.5, -0.5), (0.5, -0.5), (0.5, 0.5), (-0.5, 0.5)])],
+                         ids=['liang_barsky', 'cyrus_beck', 'cyrus_beck_polygon'])
+def test_parametric_batch_matches_scalar(engine):
+    segments = random_segments(12)
+    assert_batch_matches_clip(engine(), segments)
+    scalar, batch = engine(), engine()
+    for line in segments.tolist():
+        scalar.clip(WINDOW, *line)
+    batch.clip_batch(WINDOW, segments)
+    # The scalar loops stop at the first rejecting edge, so they may do less work
+    assert batch.counters['lines'] == scalar.counters['lines']
+    assert batch.counters['iterations'] >= scalar.counters['iterations']
+
+
+@pytest.mark.parametrize('engine', [LiangBarskyEngine, CyrusBeckEngine])
+def test_engines_agree_with_cohen_sutherland(engine):
+    # Random segments in general position: every engine finds the same visible part
+    segments = np.random.default_rng(13).uniform(-1.5, 1.5, (5000, 4))
+    expected, expected_visible = CohenSutherlandEngine().clip_batch(WINDOW, segments)
+    clipped, visible = engine().clip_batch(WINDOW, segments)
+    np.testing.assert_array_equal(visible, expected_visible)
+    np.testing.assert_allclose(clipped[visible], expected[visible], atol=1e-12)
+
+
+def clip_polygon_scalar(window, polygon):
+    """Textbook Sutherland-Hodgman on one polygon, window edges in the engine's order"""
+    bounds = {LEFT: ('xmin', 0), RIGHT: ('xmax', 0), BOTTOM: ('ymin', 1), TOP: ('ymax', 1)}
+    out = [tuple(map(float, p)) for p in polygon]
+    for edge in (LEFT, RIGHT, BOTTOM, TOP):
+        key, axis = bounds[edge]
+        value = window[key]
+
+        def inside(p):
+            return p[axis] >= value if edge in (LEFT, BOTTOM) else p[axis] <= value
+
+        def crossing(a, b):
+            other = 1 - axis
+            p = [0.0, 0.0]
+            p[axis] = value
+            p[other] = a[other] + (b[other] - a[other]) * (value - a[axis]) / (b[axis] - a[axis])
+            return tuple(p)
+
+        src, out = out, []
+        for i, start in enumerate(src):
+            end = src[(i + 1) % len(src)]
+            if inside(end):
+                if not inside(start):
+                    out.append(crossing(start, end))
+                out.append(end)
+            elif inside(start):
+                out.append(crossing(start, end))
+    return out
+
+
+def pack(polygons):
+    offsets = np.concatenate([[0], np.cumsum([len(p) for p in polygons])]).astype(np.intp)
+    points = np.array([xy for p in polygons for xy in p], dtype=float).reshape(-1, 2)
+    return points, offsets
+
+
+def assert_matches_scalar(polygons):
+    points, offsets = SutherlandHodgmanEngine().clip_batch(WINDOW, *pack(polygons))
+    assert len(offsets) == len(polygons) + 1
+    for i, polygon in enumerate(polygons):
+        expected = np.array(clip_polygon_scalar(WINDOW, polygon)).reshape(-1, 2)
+        np.testing.assert_allclose(points[offsets[i]:offsets[i + 1]], expected, atol=1e-12)
+
+
+CONVEX_INSIDE = [(-0.25, -0.25), (0.25, -0.25), (0.25, 0.25), (-0.25, 0.25)]
+CONVEX_CROSSING = [(0.0, -1.0), (1.0, 0.0), (0.0, 1.0), (-1.0, 0.0)]
+CONCAVE_U = [(-1.0, -0.25), (1.0, -0.25), (1.0, 1.0), (0.25, 1.0), (0.25, 0.0), (-0.25, 0.0),
+             (-0.25, 1.0), (-1.0, 1.0)]
+CONCAVE_STAR = [(np.cos(a) * r, np.sin(a) * r)
+                for a, r in zip(np.linspace(0, 2 * np.pi, 10, endpoint=False), [0.9, 0.3] * 5)]
+OUTSIDE = [(0.75, 0.75), (1.0, 0.75), (1.0, 1.0)]
+AROUND_CORNER = [(0.75, -1.0), (1.0, 1.0), (-1.0, 0.75)]  # outside, but its edges cross the window corners
+ON_EDGE = [(-0.5, -0.5), (0.5, -0.5), (0.5, 0.5), (-0.5, 0.5)]  # the window itself
+TOUCHING = [(-1.0, -0.25), (-0.5, -0.25), (-0.5, 0.25), (-1.0, 0.25)]  # shares part of the left edge
+
+
+@pytest.mark.parametrize('polygon', [CONVEX_INSIDE, CONVEX_CROSSING, CONCAVE_U, CONCAVE_STAR, OUTSIDE,
+                                     AROUND_CORNER, ON_EDGE, TOUCHING],
+                         ids=['inside', 'crossing', 'concave_u', 'concave_star', 'outside',
+                              'around_corner', 'on_edge', 'touching'])
+def test_sutherland_hodgman_matches_scalar(polygon):
+    assert_matches_scalar([polygon])
+
+
+def test_sutherland_hodgman_special_cases():
+    engine = SutherlandHodgmanEngine()
+    assert engine.clip(WINDOW, CONVEX_INSIDE) == CONVEX_INSIDE
+    assert engine.clip(WINDOW, OUTSIDE) == []
+    assert engine.clip(WINDOW, ON_EDGE) == ON_EDGE
+    # Only the shared edge survives, as a degenerate polygon on the window border
+    assert all(x == -0.5 for x, _ in engine.clip(WINDOW, TOUCHING))
+
+
+def test_sutherland_hodgman_batch_matches_scalar():
+    rng = np.random.default_rng(7)
+    polygons = [rng.uniform(-1.5, 1.5, (n, 2)).tolist() for n in rng.integers(3, 12, 200)]
+    # Vertices exactly on the window edges and corners
+    polygons += [rng.choice([-1.0, -0.5, 0.0, 0.5, 1.0], (n, 2)).tolist() for n in rng.integers(3, 8, 100)]
+    polygons += [[], [(0.0, 0.0)], [(0.0, 0.0), (2.0, 2.0)], OUTSIDE, CONCAVE_U]
+    assert_matches_scalar(polygons)
+
+
+def test_next_vertex_and_polygon_edges():
+    points, offsets = pack([[(0, 0), (1, 0), (0, 1)], [], [(2, 2)], [(3, 3), (4, 4)]])
+    np.testing.assert_array_equal(next_vertex(offsets), [1, 2, 0, 3, 5, 4])
+    np.testing.assert_array_equal(polygon_edges(points, offsets)[2], [0, 1, 0, 0])
+
+
+def test_polygon_batch_append_matches_packing():
+    rng = np.random.default_rng(3)
+    polygons = [rng.uniform(-1, 1, (n, 2)) for n in rng.integers(0, 9, 100)]
+    batch = PolygonBatch()
+    for polygon in polygons[:60]:
+        batch.append(polygon)
+    batch.extend(*pack(polygons[60:]))
+    points, offsets = pack(polygons)
+    assert len(batch) == len(polygons)
+    np.testing.assert_array_equal(batch.points, points)
+    np.testing.assert_array_equal(batch.offsets, offsets)
+    np.testing.assert_array_equal(batch.edges, polygon_edges(points, offsets))
+    batch.clear()
+    assert len(batch) == 0 and batch.points.shape == (0, 2) and batch.edges.shape == (0, 4)
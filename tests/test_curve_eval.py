@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import curve_eval
+from forward_diff import DRIFT_TOLERANCE, max_error
+
+
+def control_points(count, seed=0):
+    return np.random.default_rng(seed).uniform(0, 1000, (count, 2))
+
+
+def test_basis_functions_batch_matches_scalar():
+    rng = np.random.default_rng(1)
+    for k in (1, 2, 3, 5):
+        n = 12
+        knot = np.linspace(0, 1, n + k + 2)
+        t = rng.uniform(knot[k], knot[n + 1], 300)
+        spans = np.array([curve_eval.find_span(n, k, x, knot) for x in t])
+        # Neighbouring spans too: the batch version extrapolates like the scalar one
+        spans = np.clip(spans + rng.integers(-1, 2, len(t)), k, n)
+        expected = [curve_eval.basis_functions(span, k, x, knot) for span, x in zip(spans, t)]
+        np.testing.assert_array_equal(curve_eval.basis_functions_batch(spans, k, t, knot), expected)
+
+
+@pytest.mark.parametrize('degree', [1, 2, 3, 5])
+def test_basis_matrix_matches_bspline_basis(degree):
+    n = 10
+    knot = np.linspace(0, 1, n + degree + 2)
+    basis = curve_eval.basis_matrix(n, degree, 57, tuple(knot.tolist()))
+    t_values = np.linspace(knot[degree], knot[n + 1], 57)
+    expected = [[curve_eval.bspline_basis(i, degree, t, knot) for i in range(n + 1)] for t in t_values]
+    np.testing.assert_allclose(basis, expected, atol=1e-12)
+    np.testing.assert_allclose(basis.sum(axis=1), 1.0)
+
+
+@pytest.mark.parametrize('degree', [1, 2, 3, 5])
+@pytest.mark.parametrize('samples', [2, 100, 5000])
+@pytest.mark.parametrize('block', [None, 2, 17])
+def test_bspline_curve_forward_within_drift_bound(degree, samples, block):
+    pts = control_points(9)
+    reference = curve_eval.bspline_curve(pts, degree, samples, evaluator='basis')
+    forward = curve_eval.bspline_curve(pts, degree, samples, evaluator='forward', block=block)
+    assert forward.shape == reference.shape
+    assert max_error(forward, reference) <= DRIFT_TOLERANCE * np.abs(pts).max()
+
+
+@pytest.mark.parametrize('degree', [1, 3, 5])
+def test_bspline_forward_within_drift_bound(degree):
+    pts = np.hstack([control_points(9), np.zeros((9, 1))])
+    reference = curve_eval.bspline(pts, degree, 5000)
+    forward = curve_eval.bspline(pts, degree, 5000, evaluator='forward')
+    assert max_error(forward, reference) <= DRIFT_TOLERANCE * np.abs(pts).max()
+
+
+@pytest.mark.parametrize('count', [2, 4, 8])
+def test_bezier_points_forward_within_drift_bound(count):
+    pts = control_points(count)
+    reference = curve_eval.de_casteljau(pts, np.linspace(0.0, 1.0, 5001))
+    assert max_error(curve_eval.bezier_points(pts, 5000), reference) <= DRIFT_TOLERANCE * 1000
+    assert max_error(curve_eval.bezier_points_forward(pts, 5000), reference) <= DRIFT_TOLERANCE * 1000
+
+
+@pytest.mark.parametrize('count', [2, 3, 6])
+def test_elevate_degree_keeps_the_curve(count):
+    pts = control_points(count)
+    elevated = curve_eval.elevate_degree(pts)
+    assert elevated.shape == (count + 1, 2)
+    t = np.linspace(0.0, 1.0, 101)
+    np.testing.assert_allclose(curve_eval.de_casteljau(elevated, t), curve_eval.de_casteljau(pts, t), atol=1e-9)
@@ -0,0 +1,38 @@
+import json
+
+import frame_profiler
+from frame_profiler import FrameProfiler
+
+
+def record_frames(profiler, count):
+    for _ in range(count):
+        profiler.begin_frame()
+        with profiler.phase('draw'):
+            pass
+        profiler.end_frame()
+
+
+def test_profilers_sharing_a_path_write_one_merged_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(frame_profiler, '_tracing', {})
+    monkeypatch.setattr(frame_profiler.atexit, 'register', lambda fn: None)
+    path = str(tmp_path / 'trace.json')
+    first, second = FrameProfiler('bezier_curve', trace_path=path), FrameProfiler('csw', trace_path=path)
+    FrameProfiler('idle', trace_path=path)
+    record_frames(first, 2)
+    record_frames(second, 3)
+    frame_profiler.write_traces()
+    events = json.load(open(path))['traceEvents']
+    names = {e['tid']: e['args']['name'] for e in events if e['ph'] == 'M'}
+    assert names == {0: 'bezier_curve', 1: 'csw'}
+    frames = [e['tid'] for e in events if e['name'] == 'frame']
+    assert sorted(frames) == [0, 0, 1, 1, 1]
+
+
+def test_idle_profilers_leave_the_trace_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(frame_profiler, '_tracing', {})
+    monkeypatch.setattr(frame_profiler.atexit, 'register', lambda fn: None)
+    path = tmp_path / 'trace.json'
+    path.write_text('keep')
+    FrameProfiler('idle', trace_path=str(path))
+    frame_profiler.write_traces()
+    assert path.read_text() == 'keep'